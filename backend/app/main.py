@@ -72,7 +72,7 @@ app = FastAPI(
 # Configure CORS with settings
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.cors_origins,
+    allow_origins=settings.cors_origins_set,
     allow_credentials=settings.cors_credentials,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
@@ -14,13 +14,14 @@ import logging
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+from functools import cached_property
 from urllib.parse import urljoin, quote
 import re
 from bs4 import BeautifulSoup
 import hashlib
 import time
 
-from .storage import MarketDataCache, StorageError
+from .storage import StorageError, get_market_cache
 from .models import FarmLocation
 
 logger = logging.getLogger(__name__)
@@ -46,6 +47,11 @@ class PriceQuote:
     price_breaks: Optional[Dict[int, float]] = None
     cached_at: Optional[datetime] = None
     
+    @cached_property
+    def product_name_lc(self) -> str:
+        """Lowercased product name, computed once per quote"""
+        return self.product_name.lower()
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization"""
         return {
@@ -381,7 +387,7 @@ class MarketDataService:
     """
     
     def __init__(self, use_mock_data: bool = True):
-        self.cache = MarketDataCache()
+        self.cache = get_market_cache()
         self.use_mock_data = use_mock_data
         
         # Initialize data sources
@@ -583,7 +589,7 @@ class MarketDataService:
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         try:
-            cache_data = self.cache._read_json_file(self.cache.market_data_file)
+            cache_data = self.cache.get_market_data_entries()
             
             total_entries = len(cache_data)
             total_quotes = sum(len(entry.get("price_quotes", [])) for entry in cache_data.values())
@@ -22,7 +22,7 @@ from .market_data_service import MarketDataService, PriceQuote
 from .price_calculator import PriceCalculator
 from .aws_clients import get_aws_client_manager, AWSClientError, execute_aws_api_call
 from .aws_bi_transforms import AWSBIDataTransformer
-from .storage import MarketDataCache, StorageError
+from .storage import StorageError, get_market_cache
 from .intelligent_recommendations import IntelligentRecommendationEngine, RecommendationValidator
 
 logger = logging.getLogger(__name__)
@@ -51,7 +51,7 @@ class PriceAnalysisAgent:
         """
         self.market_service = MarketDataService(use_mock_data=use_mock_data)
         self.calculator = PriceCalculator()
-        self.cache = MarketDataCache()
+        self.cache = get_market_cache()
         self.enable_aws_bi = enable_aws_bi
         self.recommendation_engine = IntelligentRecommendationEngine()
         
@@ -7,11 +7,14 @@ statistical price range calculations.
 """
 
 import statistics
-import math
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Mapping, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from enum import Enum
+from types import MappingProxyType
+
+import numpy as np
 
 from .models import (
     FarmLocation, 
@@ -21,6 +24,10 @@ from .models import (
 )
 
 
+# Default seasonal pattern for unknown categories, indexed by month (1-12)
+_FLAT_SEASONALITY = (0.0,) + (1.0,) * 12
+
+
 class ProductCategory(str, Enum):
     """Product categories for different calculation approaches"""
     SEEDS = "seeds"
@@ -31,6 +38,40 @@ class ProductCategory(str, Enum):
     OTHER = "other"
 
 
+# Simplified regulatory requirements by product category
+_REGULATORY_REQUIREMENTS: Mapping[ProductCategory, Dict[str, Any]] = MappingProxyType({
+    ProductCategory.PESTICIDES: {
+        "epa_registration": True,
+        "state_licensing": True,
+        "applicator_certification": True,
+        "restricted_use": False  # Would check specific products
+    },
+    ProductCategory.FERTILIZER: {
+        "nutrient_labeling": True,
+        "state_registration": True,
+        "organic_certification": False  # Product-specific
+    },
+    ProductCategory.SEEDS: {
+        "variety_registration": True,
+        "gmo_labeling": False,  # Product-specific
+        "seed_certification": False
+    }
+})
+
+_NO_SPECIAL_REQUIREMENTS: Dict[str, Any] = {"no_special_requirements": True}
+
+# States with agricultural sales-tax exemptions (simplified)
+_AG_EXEMPT_STATES = frozenset({"IA", "IL", "IN", "NE", "KS", "MN", "WI"})
+
+# Sort rank for recommendation priorities (higher first)
+_PRIORITY_RANK = {"high": 3, "medium": 2, "low": 1}
+
+_MONTH_NAMES = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
+
+
 @dataclass
 class PriceQuote:
     """Raw price quote from market data"""
@@ -50,6 +91,11 @@ class PriceQuote:
     price_breaks: Optional[Dict[int, float]] = None
     cached_at: Optional[datetime] = None
 
+    @cached_property
+    def product_name_lc(self) -> str:
+        """Lowercased product name, computed once per quote"""
+        return self.product_name.lower()
+
 
 @dataclass
 class LogisticsCost:
@@ -99,6 +145,64 @@ class SeasonalityFactors:
     planting_calendar_alignment: float # 0.9-1.1 multiplier
 
 
+@dataclass
+class CategoryContext:
+    """Category-specific parameters resolved once per product analysis"""
+    category: ProductCategory
+    wastage_factor: float
+    seasonal_multipliers: Tuple[float, ...]  # indexed by month, 1-12
+    planting_months: List[int]
+
+
+@lru_cache(maxsize=4096)
+def _categorize_product_cached(name_lower: str) -> ProductCategory:
+    """Categorize a lowercased product name (memoized, names repeat across batches)"""
+    if any(word in name_lower for word in ["seed", "corn", "soybean", "wheat", "barley"]):
+        return ProductCategory.SEEDS
+    elif any(word in name_lower for word in ["fertilizer", "nitrogen", "phosphorus", "potash", "urea"]):
+        return ProductCategory.FERTILIZER
+    elif any(word in name_lower for word in ["pesticide", "herbicide", "insecticide", "fungicide"]):
+        return ProductCategory.PESTICIDES
+    elif any(word in name_lower for word in ["tractor", "plow", "harvester", "equipment"]):
+        return ProductCategory.EQUIPMENT
+    elif any(word in name_lower for word in ["fuel", "diesel", "gasoline", "propane"]):
+        return ProductCategory.FUEL
+    else:
+        return ProductCategory.OTHER
+
+
+# Percentiles reported in price ranges (p10, p25, p35, p50, p90)
+_PRICE_PERCENTILES = (10, 25, 35, 50, 90)
+
+# Below this many quotes, plain Python loops beat NumPy's fixed call overhead
+_VECTORIZE_MIN_QUOTES = 100
+
+# Reference multiplier for the current-vs-optimal seasonal ratio.
+_OPTIMAL_SEASON_MULT = 0.8
+
+_RISK_LEVELS = ("low", "medium", "high")
+
+
+def _risk_core(n_suppliers: int, n_unique_locations: int, n_locations: int) -> Tuple[float, float, float, int]:
+    """
+    Pure numeric core of the supply chain risk assessment.
+    
+    Returns (supplier_diversity, geographic_diversity, risk_score, risk_level)
+    where risk_level indexes _RISK_LEVELS.
+    """
+    # Analyze supplier diversity
+    supplier_diversity = min(1.0, n_suppliers / 5.0)  # Normalize to 0-1
+    
+    # Analyze geographic diversity
+    geographic_diversity = n_unique_locations / max(1, n_locations)
+    
+    # Overall risk score (lower is better)
+    risk_score = 1.0 - ((supplier_diversity + geographic_diversity) / 2.0)
+    
+    risk_level = 2 if risk_score > 0.7 else 1 if risk_score > 0.4 else 0
+    return supplier_diversity, geographic_diversity, risk_score, risk_level
+
+
 class PriceCalculator:
     """
     Comprehensive price calculator implementing economic analysis framework
@@ -116,7 +220,8 @@ class PriceCalculator:
             ProductCategory.OTHER: 0.01        # 1% default
         }
         
-        # Base tax rates by state (simplified - would use real tax API)
+        # Base tax rates by state (simplified - would use real tax API).
+        # Keys are interned literals; look the rate up once per request.
         self.state_tax_rates = {
             "CA": 0.0725, "TX": 0.0625, "FL": 0.06, "NY": 0.08,
             "IL": 0.0625, "PA": 0.06, "OH": 0.0575, "GA": 0.04,
@@ -143,12 +248,21 @@ class PriceCalculator:
                 11: 1.00, 12: 1.00
             }
         }
+        
+        # Month-indexed lookup tables (index 0 unused) built from the
+        # multipliers above, so the hot path does a tuple index instead of
+        # a dict probe per month
+        self._seasonal_arr = {
+            category: (0.0,) + tuple(monthly[m] for m in range(1, 13))
+            for category, monthly in self.seasonal_multipliers.items()
+        }
 
     def calculate_effective_delivered_cost(
         self, 
         quote: PriceQuote, 
         farm_location: FarmLocation,
-        product_input: ProductInput
+        product_input: ProductInput,
+        ctx: Optional[CategoryContext] = None
     ) -> Dict[str, float]:
         """
         Calculate comprehensive effective delivered cost per unit.
@@ -165,9 +279,9 @@ class PriceCalculator:
         taxes_fees = self._calculate_taxes_and_fees(quote, farm_location, base_price)
         
         # 4. Apply wastage factor
-        product_category = self._categorize_product(product_input.name)
-        wastage_factor = self.wastage_factors.get(product_category, 0.01)
-        wastage_adjustment = base_price * wastage_factor
+        if ctx is None:
+            ctx = self._build_category_context(product_input.name)
+        wastage_adjustment = base_price * ctx.wastage_factor
         
         # 5. Calculate total effective cost
         total_cost = base_price + logistics.total + taxes_fees.total + wastage_adjustment
@@ -190,22 +304,23 @@ class PriceCalculator:
             }
         }
 
-    def calculate_price_ranges(self, effective_costs: List[float]) -> EffectiveCost:
+    def calculate_price_ranges(self, effective_costs: Union[List[float], np.ndarray]) -> EffectiveCost:
         """
         Calculate statistical price ranges using percentiles.
         Removes outliers using MAD (Median Absolute Deviation).
         
         Requirements: 4.1, 4.3
         """
-        if not effective_costs:
+        costs = np.asarray(effective_costs, dtype=np.float64)
+        if costs.size == 0:
             return EffectiveCost()
         
         # Remove outliers using MAD method
-        cleaned_costs = self._remove_outliers_mad(effective_costs)
+        cleaned_costs = self._remove_outliers_mad(costs)
         
-        if len(cleaned_costs) < 2:
+        if cleaned_costs.size < 2:
             # Not enough data for statistical analysis
-            avg_cost = sum(effective_costs) / len(effective_costs)
+            avg_cost = float(costs.mean())
             return EffectiveCost(
                 p10=avg_cost * 0.9,
                 p25=avg_cost * 0.95,
@@ -214,29 +329,15 @@ class PriceCalculator:
                 p90=avg_cost * 1.1
             )
         
-        # Calculate percentiles
-        sorted_costs = sorted(cleaned_costs)
-        n = len(sorted_costs)
-        
-        def percentile(data: List[float], p: float) -> float:
-            """Calculate percentile using linear interpolation"""
-            if not data:
-                return 0.0
-            k = (len(data) - 1) * p / 100
-            f = math.floor(k)
-            c = math.ceil(k)
-            if f == c:
-                return data[int(k)]
-            d0 = data[int(f)] * (c - k)
-            d1 = data[int(c)] * (k - f)
-            return d0 + d1
+        # Calculate all percentiles in one pass (linear interpolation)
+        p10, p25, p35, p50, p90 = np.percentile(cleaned_costs, _PRICE_PERCENTILES).tolist()
         
         return EffectiveCost(
-            p10=percentile(sorted_costs, 10),
-            p25=percentile(sorted_costs, 25),
-            p35=percentile(sorted_costs, 35),
-            p50=percentile(sorted_costs, 50),
-            p90=percentile(sorted_costs, 90)
+            p10=p10,
+            p25=p25,
+            p35=p35,
+            p50=p50,
+            p90=p90
         )
 
     def calculate_confidence_score(self, quotes: List[PriceQuote]) -> float:
@@ -416,8 +517,9 @@ class PriceCalculator:
         else:
             avg_distance = 500.0  # Default assumption
         
-        # Local competition level
-        num_local_suppliers = sum(1 for q in quotes if q.location and self._is_local_supplier(farm_location, q.location))
+        # Local competition level (same-state check, see _is_local_supplier)
+        farm_state = farm_location.state
+        num_local_suppliers = sum(1 for loc in supplier_locations if farm_state in loc)
         competition_level = min(1.1, 0.9 + (num_local_suppliers * 0.05))
         
         # Transportation infrastructure (simplified by state)
@@ -435,32 +537,34 @@ class PriceCalculator:
             transportation_infrastructure=infrastructure
         )
 
-    def calculate_seasonality_factors(self, product_input: ProductInput) -> SeasonalityFactors:
+    def calculate_seasonality_factors(
+        self, 
+        product_input: ProductInput,
+        ctx: Optional[CategoryContext] = None
+    ) -> SeasonalityFactors:
         """
         Calculate seasonality factors for optimal timing.
         
         Requirements: 4.7
         """
-        product_category = self._categorize_product(product_input.name)
+        if ctx is None:
+            ctx = self._build_category_context(product_input.name)
         current_month = datetime.now().month
         
         # Get seasonal multipliers for this product category
-        seasonal_data = self.seasonal_multipliers.get(product_category, {})
-        if not seasonal_data:
-            # Default seasonal pattern for unknown categories
-            seasonal_data = {i: 1.0 for i in range(1, 13)}
+        seasonal_data = ctx.seasonal_multipliers
         
-        current_multiplier = seasonal_data.get(current_month, 1.0)
+        current_multiplier = seasonal_data[current_month]
         
         # Find optimal purchase month (lowest multiplier)
-        optimal_month = min(seasonal_data.keys(), key=lambda k: seasonal_data[k])
+        optimal_month = min(range(1, 13), key=seasonal_data.__getitem__)
         optimal_multiplier = seasonal_data[optimal_month]
         
         # Calculate potential savings
         savings_potential = ((current_multiplier - optimal_multiplier) / current_multiplier) * 100
         
         # Planting calendar alignment (simplified)
-        planting_months = self._get_planting_months(product_category)
+        planting_months = ctx.planting_months
         if current_month in planting_months:
             calendar_alignment = 1.1  # Premium for planting season
         elif current_month in [m - 1 for m in planting_months]:  # Month before planting
@@ -532,7 +636,7 @@ class PriceCalculator:
         regulatory_fees = 0.50  # Flat fee per unit
         
         # Certification costs (for organic/certified products)
-        certification_costs = 0.25 if "organic" in quote.product_name.lower() else 0.0
+        certification_costs = 0.25 if "organic" in quote.product_name_lc else 0.0
         
         # Payment processing (2.9% for credit cards)
         payment_processing = base_price * 0.029
@@ -547,38 +651,26 @@ class PriceCalculator:
             total=total
         )
 
-    def _remove_outliers_mad(self, data: List[float], threshold: float = 2.5) -> List[float]:
+    def _remove_outliers_mad(self, data: np.ndarray, threshold: float = 2.5) -> np.ndarray:
         """Remove outliers using Median Absolute Deviation"""
-        if len(data) < 3:
+        if data.size < 3:
             return data
         
-        median = statistics.median(data)
-        mad = statistics.median([abs(x - median) for x in data])
+        median = np.median(data)
+        deviations = data - median
+        mad = np.median(np.abs(deviations))
         
         if mad == 0:
             return data
         
         # Modified Z-score
-        modified_z_scores = [0.6745 * (x - median) / mad for x in data]
+        modified_z_scores = 0.6745 * deviations / mad
         
-        return [data[i] for i, z in enumerate(modified_z_scores) if abs(z) < threshold]
+        return data[np.abs(modified_z_scores) < threshold]
 
     def _categorize_product(self, product_name: str) -> ProductCategory:
         """Categorize product based on name"""
-        name_lower = product_name.lower()
-        
-        if any(word in name_lower for word in ["seed", "corn", "soybean", "wheat", "barley"]):
-            return ProductCategory.SEEDS
-        elif any(word in name_lower for word in ["fertilizer", "nitrogen", "phosphorus", "potash", "urea"]):
-            return ProductCategory.FERTILIZER
-        elif any(word in name_lower for word in ["pesticide", "herbicide", "insecticide", "fungicide"]):
-            return ProductCategory.PESTICIDES
-        elif any(word in name_lower for word in ["tractor", "plow", "harvester", "equipment"]):
-            return ProductCategory.EQUIPMENT
-        elif any(word in name_lower for word in ["fuel", "diesel", "gasoline", "propane"]):
-            return ProductCategory.FUEL
-        else:
-            return ProductCategory.OTHER
+        return _categorize_product_cached(product_name.lower())
 
     def _extract_canonical_spec(self, product_input: ProductInput) -> str:
         """Extract canonical product specification"""
@@ -662,6 +754,16 @@ class PriceCalculator:
         """Check if supplier is local (same state)"""
         return farm_location.state in supplier_location
 
+    def _build_category_context(self, product_name: str) -> CategoryContext:
+        """Resolve category-specific parameters for a product in one pass"""
+        category = self._categorize_product(product_name)
+        return CategoryContext(
+            category=category,
+            wastage_factor=self.wastage_factors.get(category, 0.01),
+            seasonal_multipliers=self._seasonal_arr.get(category, _FLAT_SEASONALITY),
+            planting_months=self._get_planting_months(category)
+        )
+
     def _get_planting_months(self, category: ProductCategory) -> List[int]:
         """Get typical planting months for product category"""
         planting_calendar = {
@@ -697,6 +799,9 @@ class PriceCalculator:
                 "analysis_complete": False
             }
 
+        # Resolve the product category once for all downstream steps
+        ctx = self._build_category_context(product_input.name)
+
         # 1. Product Specification Analysis (Requirement 4.4)
         spec_analysis = self.analyze_product_specifications(product_input, quotes)
         
@@ -707,27 +812,30 @@ class PriceCalculator:
         location_factors = self.calculate_location_factors(farm_location, quotes)
         
         # 4. Seasonality Analysis (Requirement 4.7)
-        seasonality_factors = self.calculate_seasonality_factors(product_input)
+        seasonality_factors = self.calculate_seasonality_factors(product_input, ctx)
         
         # 5. Calculate effective costs for all quotes
-        effective_costs = []
-        detailed_cost_breakdowns = []
+        detailed_cost_breakdowns = [
+            self.calculate_effective_delivered_cost(quote, farm_location, product_input, ctx)
+            for quote in quotes
+        ]
         
-        for quote in quotes:
-            cost_breakdown = self.calculate_effective_delivered_cost(quote, farm_location, product_input)
-            
-            # Apply location and seasonality adjustments
-            adjusted_cost = cost_breakdown["total_effective_cost"]
-            adjusted_cost *= location_factors.regional_market_density
-            adjusted_cost *= location_factors.local_competition_level  
-            adjusted_cost *= location_factors.transportation_infrastructure
-            adjusted_cost *= seasonality_factors.current_season_multiplier
-            adjusted_cost *= seasonality_factors.planting_calendar_alignment
-            adjusted_cost *= spec_analysis.quality_adjustment
-            
-            effective_costs.append(adjusted_cost)
-            
-            # Store detailed breakdown with adjustments
+        # Apply location and seasonality adjustments to all quotes at once,
+        # keeping the adjusted costs in one contiguous float64 buffer
+        adjusted_costs = np.fromiter(
+            (cost_breakdown["total_effective_cost"] for cost_breakdown in detailed_cost_breakdowns),
+            dtype=np.float64,
+            count=len(detailed_cost_breakdowns)
+        )
+        adjusted_costs *= location_factors.regional_market_density
+        adjusted_costs *= location_factors.local_competition_level
+        adjusted_costs *= location_factors.transportation_infrastructure
+        adjusted_costs *= seasonality_factors.current_season_multiplier
+        adjusted_costs *= seasonality_factors.planting_calendar_alignment
+        adjusted_costs *= spec_analysis.quality_adjustment
+        
+        # Store detailed breakdown with adjustments
+        for cost_breakdown, adjusted_cost in zip(detailed_cost_breakdowns, adjusted_costs.tolist()):
             cost_breakdown["location_adjustments"] = {
                 "regional_density_factor": location_factors.regional_market_density,
                 "competition_factor": location_factors.local_competition_level,
@@ -739,25 +847,23 @@ class PriceCalculator:
             }
             cost_breakdown["quality_adjustment"] = spec_analysis.quality_adjustment
             cost_breakdown["final_adjusted_cost"] = adjusted_cost
-            
-            detailed_cost_breakdowns.append(cost_breakdown)
         
         # 6. Calculate statistical price ranges
-        price_ranges = self.calculate_price_ranges(effective_costs)
+        price_ranges = self.calculate_price_ranges(adjusted_costs)
         
         # 7. Calculate confidence score
         confidence_score = self.calculate_confidence_score(quotes)
         
         # 8. Generate market dynamics analysis
-        market_dynamics = self._analyze_market_dynamics(quotes, effective_costs, seasonality_factors)
+        market_dynamics = self._analyze_market_dynamics(quotes, adjusted_costs, seasonality_factors)
         
         # 9. Assess compliance and risk factors
-        compliance_analysis = self._analyze_compliance_requirements(product_input, quotes, farm_location)
+        compliance_analysis = self._analyze_compliance_requirements(product_input, quotes, farm_location, ctx.category)
         
         # 10. Generate optimization recommendations
         optimization_recommendations = self._generate_optimization_recommendations(
             product_input, supplier_evaluations, seasonality_factors, 
-            location_factors, spec_analysis, effective_costs
+            location_factors, spec_analysis, adjusted_costs
         )
         
         return {
@@ -804,7 +910,7 @@ class PriceCalculator:
     def _analyze_market_dynamics(
         self, 
         quotes: List[PriceQuote], 
-        effective_costs: List[float], 
+        effective_costs: Union[List[float], np.ndarray], 
         seasonality: SeasonalityFactors
     ) -> Dict[str, Any]:
         """
@@ -812,23 +918,27 @@ class PriceCalculator:
         
         Requirements: 4.5 (market dynamics analysis)
         """
-        if not effective_costs:
+        # Price volatility analysis (single contiguous buffer for all reductions;
+        # a float64 array is used as-is without copying)
+        costs = np.asarray(effective_costs, dtype=np.float64)
+        if costs.size == 0:
             return {"analysis_available": False}
         
-        # Price volatility analysis
-        mean_price = statistics.mean(effective_costs)
-        if len(effective_costs) > 1:
-            price_volatility = statistics.stdev(effective_costs) / mean_price
+        mean_price = float(costs.mean())
+        if costs.size > 1:
+            price_volatility = float(costs.std(ddof=1)) / mean_price
         else:
             price_volatility = 0.0
         
-        # Price trend analysis (simplified - would use historical data)
-        sorted_prices = sorted(effective_costs)
+        # Price trend analysis (simplified - would use historical data);
+        # only the extremes are needed, so skip sorting
         price_trend = "stable"
-        if len(sorted_prices) >= 3:
-            if sorted_prices[-1] > sorted_prices[0] * 1.1:
+        if costs.size >= 3:
+            lo = costs.min()
+            hi = costs.max()
+            if hi > lo * 1.1:
                 price_trend = "increasing"
-            elif sorted_prices[-1] < sorted_prices[0] * 0.9:
+            elif hi < lo * 0.9:
                 price_trend = "decreasing"
         
         # Commodity linkage analysis (simplified)
@@ -843,11 +953,11 @@ class PriceCalculator:
             "volatility_level": "high" if price_volatility > 0.2 else "medium" if price_volatility > 0.1 else "low",
             "price_trend": price_trend,
             "mean_market_price": mean_price,
-            "price_range_spread": max(effective_costs) - min(effective_costs) if effective_costs else 0,
+            "price_range_spread": float(np.ptp(costs)),
             "commodity_linkage": commodity_factors,
             "supply_chain_risk": supply_risk,
             "seasonal_impact": {
-                "current_vs_optimal": seasonality.current_season_multiplier / min(0.8, 1.0),
+                "current_vs_optimal": seasonality.current_season_multiplier / _OPTIMAL_SEASON_MULT,
                 "seasonal_volatility": seasonality.seasonal_savings_potential
             }
         }
@@ -856,14 +966,16 @@ class PriceCalculator:
         self, 
         product_input: ProductInput, 
         quotes: List[PriceQuote], 
-        farm_location: FarmLocation
+        farm_location: FarmLocation,
+        product_category: Optional[ProductCategory] = None
     ) -> Dict[str, Any]:
         """
         Analyze compliance requirements including regulatory status, certifications, taxes.
         
         Requirements: 4.6 (compliance requirements)
         """
-        product_category = self._categorize_product(product_input.name)
+        if product_category is None:
+            product_category = self._categorize_product(product_input.name)
         
         # Regulatory status analysis
         regulatory_requirements = self._get_regulatory_requirements(product_category, farm_location.state)
@@ -894,75 +1006,124 @@ class PriceCalculator:
         seasonality: SeasonalityFactors,
         location: LocationFactors,
         spec_analysis: ProductSpecAnalysis,
-        effective_costs: List[float]
+        effective_costs: Union[List[float], np.ndarray]
     ) -> List[Dict[str, Any]]:
         """
         Generate comprehensive optimization recommendations.
         
         Combines insights from all analysis components to provide actionable recommendations.
         """
-        recommendations = []
+        # Mean adjusted cost shared by the savings estimates below
+        costs = np.asarray(effective_costs, dtype=np.float64)
+        if costs.size:
+            mean_effective_cost = float(costs.mean())
+        else:
+            mean_effective_cost = 0.0
+        
+        candidates = (
+            self._rec_quantity(product_input, supplier_evaluations),
+            self._rec_seasonal(product_input, seasonality, mean_effective_cost),
+            self._rec_substitute(spec_analysis),
+            self._rec_location(location),
+            self._rec_quality(product_input, spec_analysis, mean_effective_cost)
+        )
+        recommendations = [rec for rec in candidates if rec is not None]
         
-        # 1. Quantity optimization recommendations
-        if supplier_evaluations:
-            best_supplier = supplier_evaluations[0]  # Already sorted by value score
-            
-            if not best_supplier.get("moq_met", True):
-                moq_shortfall = best_supplier.get("moq_shortfall", 0)
-                recommendations.append({
-                    "type": "QUANTITY_OPTIMIZATION",
-                    "priority": "high",
-                    "description": f"Increase quantity by {moq_shortfall} units to meet MOQ and unlock better pricing",
-                    "potential_savings": best_supplier.get("price_break_savings", 0) * product_input.quantity,
-                    "action_required": f"Consider ordering {moq_shortfall + product_input.quantity} units total",
-                    "confidence": 0.9
-                })
-        
-        # 2. Seasonal timing recommendations
-        if seasonality.seasonal_savings_potential > 5.0:  # More than 5% savings potential
-            recommendations.append({
-                "type": "SEASONAL_TIMING",
-                "priority": "medium",
-                "description": f"Optimal purchase timing in month {seasonality.optimal_purchase_month} could save {seasonality.seasonal_savings_potential:.1f}%",
-                "potential_savings": (sum(effective_costs) / len(effective_costs)) * (seasonality.seasonal_savings_potential / 100) * product_input.quantity,
-                "action_required": f"Plan purchase for {self._month_name(seasonality.optimal_purchase_month)} if timing allows",
-                "confidence": 0.8
-            })
-        
-        # 3. Substitute product recommendations
-        if spec_analysis.substitute_skus:
-            recommendations.append({
-                "type": "SUBSTITUTE_PRODUCTS",
-                "priority": "low",
-                "description": f"Consider substitute products: {', '.join(spec_analysis.substitute_skus[:3])}",
-                "potential_savings": 0,  # Would need substitute pricing to calculate
-                "action_required": "Research pricing for substitute products",
-                "confidence": 0.6
-            })
-        
-        # 4. Location-based recommendations
-        if location.local_competition_level < 0.95:  # Low local competition
-            recommendations.append({
-                "type": "SUPPLIER_DIVERSIFICATION",
-                "priority": "medium",
-                "description": "Limited local competition detected - consider expanding supplier search radius",
-                "potential_savings": 0,
-                "action_required": "Search for suppliers in neighboring states or regions",
-                "confidence": 0.7
-            })
-        
-        # 5. Quality optimization recommendations
-        if spec_analysis.quality_adjustment > 1.02:  # Premium quality premium
-            recommendations.append({
-                "type": "QUALITY_OPTIMIZATION",
-                "priority": "low",
-                "description": "Premium quality specifications may be adding unnecessary cost",
-                "potential_savings": (sum(effective_costs) / len(effective_costs)) * 0.02 * product_input.quantity,
-                "action_required": "Evaluate if standard grade meets requirements",
-                "confidence": 0.6
-            })
-        
-        return sorted(recommendations, key=lambda x: {"high": 3, "medium": 2, "low": 1}[x["priority"]], reverse=True)
+        recommendations.sort(key=lambda x: _PRIORITY_RANK[x["priority"]], reverse=True)
+        return recommendations
+
+    def _rec_quantity(
+        self,
+        product_input: ProductInput,
+        supplier_evaluations: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Quantity optimization recommendation"""
+        if not supplier_evaluations:
+            return None
+        
+        best_supplier = supplier_evaluations[0]  # Already sorted by value score
+        if best_supplier.get("moq_met", True):
+            return None
+        
+        moq_shortfall = best_supplier.get("moq_shortfall", 0)
+        price_break_savings = best_supplier.get("price_break_savings", 0)
+        quantity = product_input.quantity
+        return {
+            "type": "QUANTITY_OPTIMIZATION",
+            "priority": "high",
+            "description": f"Increase quantity by {moq_shortfall} units to meet MOQ and unlock better pricing",
+            "potential_savings": price_break_savings * quantity,
+            "action_required": f"Consider ordering {moq_shortfall + quantity} units total",
+            "confidence": 0.9
+        }
+
+    def _rec_seasonal(
+        self,
+        product_input: ProductInput,
+        seasonality: SeasonalityFactors,
+        mean_effective_cost: float
+    ) -> Optional[Dict[str, Any]]:
+        """Seasonal timing recommendation"""
+        savings_potential = seasonality.seasonal_savings_potential
+        if savings_potential <= 5.0:  # Needs more than 5% savings potential
+            return None
+        
+        optimal_month = seasonality.optimal_purchase_month
+        return {
+            "type": "SEASONAL_TIMING",
+            "priority": "medium",
+            "description": f"Optimal purchase timing in month {optimal_month} could save {savings_potential:.1f}%",
+            "potential_savings": mean_effective_cost * (savings_potential / 100) * product_input.quantity,
+            "action_required": f"Plan purchase for {self._month_name(optimal_month)} if timing allows",
+            "confidence": 0.8
+        }
+
+    def _rec_substitute(self, spec_analysis: ProductSpecAnalysis) -> Optional[Dict[str, Any]]:
+        """Substitute product recommendation"""
+        if not spec_analysis.substitute_skus:
+            return None
+        
+        return {
+            "type": "SUBSTITUTE_PRODUCTS",
+            "priority": "low",
+            "description": f"Consider substitute products: {', '.join(spec_analysis.substitute_skus[:3])}",
+            "potential_savings": 0,  # Would need substitute pricing to calculate
+            "action_required": "Research pricing for substitute products",
+            "confidence": 0.6
+        }
+
+    def _rec_location(self, location: LocationFactors) -> Optional[Dict[str, Any]]:
+        """Location-based recommendation"""
+        if location.local_competition_level >= 0.95:  # Only for low local competition
+            return None
+        
+        return {
+            "type": "SUPPLIER_DIVERSIFICATION",
+            "priority": "medium",
+            "description": "Limited local competition detected - consider expanding supplier search radius",
+            "potential_savings": 0,
+            "action_required": "Search for suppliers in neighboring states or regions",
+            "confidence": 0.7
+        }
+
+    def _rec_quality(
+        self,
+        product_input: ProductInput,
+        spec_analysis: ProductSpecAnalysis,
+        mean_effective_cost: float
+    ) -> Optional[Dict[str, Any]]:
+        """Quality optimization recommendation"""
+        if spec_analysis.quality_adjustment <= 1.02:  # Only for a premium quality premium
+            return None
+        
+        return {
+            "type": "QUALITY_OPTIMIZATION",
+            "priority": "low",
+            "description": "Premium quality specifications may be adding unnecessary cost",
+            "potential_savings": mean_effective_cost * 0.02 * product_input.quantity,
+            "action_required": "Evaluate if standard grade meets requirements",
+            "confidence": 0.6
+        }
 
     # Additional helper methods for comprehensive analysis
     
@@ -977,57 +1138,46 @@ class PriceCalculator:
     
     def _assess_supply_chain_risk(self, quotes: List[PriceQuote]) -> Dict[str, Any]:
         """Assess supply chain risk factors"""
-        # Analyze supplier diversity
-        unique_suppliers = len(set(q.supplier for q in quotes))
-        supplier_diversity = min(1.0, unique_suppliers / 5.0)  # Normalize to 0-1
-        
-        # Analyze geographic diversity
-        locations = [q.location for q in quotes if q.location]
-        geographic_diversity = len(set(locations)) / max(1, len(locations))
-        
-        # Overall risk score (lower is better)
-        risk_score = 1.0 - ((supplier_diversity + geographic_diversity) / 2.0)
+        # Collect suppliers and locations in a single pass
+        suppliers = set()
+        unique_locations = set()
+        num_locations = 0
+        for q in quotes:
+            suppliers.add(q.supplier)
+            location = q.location
+            if location:
+                unique_locations.add(location)
+                num_locations += 1
+        
+        supplier_diversity, geographic_diversity, risk_score, risk_level = _risk_core(
+            len(suppliers), len(unique_locations), num_locations
+        )
         
         return {
             "supplier_diversity_score": supplier_diversity,
             "geographic_diversity_score": geographic_diversity,
             "overall_risk_score": risk_score,
-            "risk_level": "high" if risk_score > 0.7 else "medium" if risk_score > 0.4 else "low"
+            "risk_level": _RISK_LEVELS[risk_level]
         }
     
     def _get_regulatory_requirements(self, category: ProductCategory, state: str) -> Dict[str, Any]:
         """Get regulatory requirements by product category and state"""
-        # Simplified regulatory requirements
-        requirements = {
-            ProductCategory.PESTICIDES: {
-                "epa_registration": True,
-                "state_licensing": True,
-                "applicator_certification": True,
-                "restricted_use": False  # Would check specific products
-            },
-            ProductCategory.FERTILIZER: {
-                "nutrient_labeling": True,
-                "state_registration": True,
-                "organic_certification": False  # Product-specific
-            },
-            ProductCategory.SEEDS: {
-                "variety_registration": True,
-                "gmo_labeling": False,  # Product-specific
-                "seed_certification": False
-            }
-        }
-        
-        return requirements.get(category, {"no_special_requirements": True})
+        # Copy so callers can annotate the result without touching the table
+        return dict(_REGULATORY_REQUIREMENTS.get(category, _NO_SPECIAL_REQUIREMENTS))
     
     def _analyze_certifications(self, product_input: ProductInput, quotes: List[PriceQuote]) -> Dict[str, Any]:
         """Analyze certification requirements and availability"""
         # Check for organic requirements
-        organic_required = "organic" in product_input.name.lower() or (
-            product_input.specifications and "organic" in product_input.specifications.lower()
-        )
-        
-        # Count organic suppliers
-        organic_suppliers = sum(1 for q in quotes if "organic" in q.product_name.lower())
+        name_lc = product_input.name.lower()
+        spec_lc = product_input.specifications.lower() if product_input.specifications else ""
+        organic_required = "organic" in name_lc or "organic" in spec_lc
+        
+        # Count organic suppliers (vectorized scan only pays off for large quote sets)
+        if len(quotes) >= _VECTORIZE_MIN_QUOTES:
+            names = np.array([q.product_name_lc for q in quotes], dtype=str)
+            organic_suppliers = int((np.char.find(names, "organic") >= 0).sum())
+        else:
+            organic_suppliers = sum(1 for q in quotes if "organic" in q.product_name_lc)
         
         return {
             "organic_required": organic_required,
@@ -1039,17 +1189,23 @@ class PriceCalculator:
     def _analyze_tax_implications(self, product_input: ProductInput, farm_location: FarmLocation, quotes: List[PriceQuote]) -> Dict[str, Any]:
         """Analyze tax implications and exemptions"""
         # Agricultural exemptions (simplified)
-        ag_exempt_states = ["IA", "IL", "IN", "NE", "KS", "MN", "WI"]
-        has_ag_exemption = farm_location.state in ag_exempt_states
+        has_ag_exemption = farm_location.state in _AG_EXEMPT_STATES
         
         base_tax_rate = self.state_tax_rates.get(farm_location.state, 0.06)
         effective_tax_rate = 0.0 if has_ag_exemption else base_tax_rate
         
+        if has_ag_exemption:
+            base_prices = np.fromiter((q.base_price for q in quotes), dtype=np.float64, count=len(quotes))
+            total_base_price = float(base_prices.sum())
+            estimated_tax_savings = base_tax_rate * total_base_price * product_input.quantity
+        else:
+            estimated_tax_savings = 0
+        
         return {
             "base_tax_rate": base_tax_rate,
             "agricultural_exemption": has_ag_exemption,
             "effective_tax_rate": effective_tax_rate,
-            "estimated_tax_savings": base_tax_rate * sum(q.base_price for q in quotes) * product_input.quantity if has_ag_exemption else 0
+            "estimated_tax_savings": estimated_tax_savings
         }
     
     def _analyze_payment_terms(self, quotes: List[PriceQuote]) -> Dict[str, Any]:
@@ -1064,27 +1220,17 @@ class PriceCalculator:
     
     def _calculate_compliance_score(self, regulatory: Dict, certification: Dict, tax: Dict) -> float:
         """Calculate overall compliance score"""
-        # Simplified compliance scoring
-        score = 1.0
+        # Simplified compliance scoring on 0/1 flags:
+        # penalty for complex regulatory requirements and certification
+        # requirements, bonus for tax exemptions
+        has_regulatory = bool(regulatory.get("epa_registration") or regulatory.get("state_licensing"))
+        has_certification = bool(certification.get("organic_required"))
+        has_tax_exemption = bool(tax.get("agricultural_exemption"))
         
-        # Penalty for complex regulatory requirements
-        if regulatory.get("epa_registration") or regulatory.get("state_licensing"):
-            score -= 0.1
+        score = 1.0 - 0.1 * has_regulatory - 0.05 * has_certification + 0.05 * has_tax_exemption
         
-        # Penalty for certification requirements
-        if certification.get("organic_required"):
-            score -= 0.05
-        
-        # Bonus for tax exemptions
-        if tax.get("agricultural_exemption"):
-            score += 0.05
-        
-        return max(0.0, min(1.0, score))
+        return 0.0 if score < 0.0 else 1.0 if score > 1.0 else score
     
     def _month_name(self, month_num: int) -> str:
         """Convert month number to name"""
-        months = [
-            "January", "February", "March", "April", "May", "June",
-            "July", "August", "September", "October", "November", "December"
-        ]
-        return months[month_num - 1] if 1 <= month_num <= 12 else "Unknown"
\ No newline at end of file
+        return _MONTH_NAMES[month_num - 1] if 1 <= month_num <= 12 else "Unknown"
\ No newline at end of file
@@ -0,0 +1,595 @@
+"""
+SQLite-backed storage for the farmer budget optimizer.
+
+Drop-in alternative to the JSON file storage in ``storage.py``, selected with
+``STORAGE_BACKEND=sqlite``. All data lives in a single ``storage.db`` opened in
+WAL mode, so lookups and listings are indexed queries and readers never block
+the writer. Records are kept as JSON payloads next to the columns that are
+filtered or sorted on, and are returned in the same shape as the JSON backend.
+
+Switching ``STORAGE_BACKEND`` does not move any data: sessions, alerts,
+purchases and cached market data written by the JSON backend stay in their
+files and are not visible to this one. Run ``import_json_storage()`` (or
+``python -m app.sqlite_storage [cache_dir]``) once before switching to copy
+them into ``storage.db``.
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Any
+import logging
+
+from .models import AnalyzeResponse, PriceAlert, PurchaseRecord
+from .storage import StorageError, _dumps, _entry_timestamp, _loads
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS market_cache (
+    cache_key TEXT PRIMARY KEY,
+    product_name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    updated_ts REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_market_cache_updated ON market_cache (updated_ts);
+
+CREATE TABLE IF NOT EXISTS price_alerts (
+    alert_id TEXT PRIMARY KEY,
+    product_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_price_alerts_created ON price_alerts (created_at);
+CREATE INDEX IF NOT EXISTS idx_price_alerts_status
+    ON price_alerts (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_price_alerts_product
+    ON price_alerts (product_name, created_at);
+
+CREATE TABLE IF NOT EXISTS purchase_records (
+    purchase_id TEXT PRIMARY KEY,
+    product_name TEXT NOT NULL,
+    supplier TEXT NOT NULL,
+    purchase_date TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_purchase_records_product
+    ON purchase_records (product_name, purchase_date);
+CREATE INDEX IF NOT EXISTS idx_purchase_records_supplier
+    ON purchase_records (product_name, supplier, purchase_date);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    created_ts REAL NOT NULL,
+    last_accessed TEXT NOT NULL,
+    product_count INTEGER NOT NULL,
+    total_budget REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions (created_ts);
+"""
+
+# One connection per database file, shared by every storage instance in the
+# process; sqlite3 connections are not safe for concurrent use, hence the lock
+_connections: Dict[Path, "_Database"] = {}
+_connections_lock = threading.Lock()
+
+# Rows fetched per query by the iter_* methods
+_ITER_BATCH = 64
+
+
+class _Database:
+    """Serialized access to one SQLite connection in autocommit mode"""
+
+    def __init__(self, db_path: Path):
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    # Results are read before the lock is released, so no thread ever
+    # consumes a cursor while another statement runs on the connection
+
+    def execute(self, sql: str, params: tuple = ()) -> None:
+        with self.lock:
+            self.conn.execute(sql, params)
+
+    def execute_rowcount(self, sql: str, params: tuple = ()) -> int:
+        with self.lock:
+            return self.conn.execute(sql, params).rowcount
+
+    def fetchone(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def executemany(self, sql: str, rows: List[tuple]) -> None:
+        """Run ``sql`` for every row inside one transaction, so one commit"""
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(sql, rows)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def iter_pages(self, select: str, params: tuple, order_column: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the decoded payloads of ``select`` newest first, fetching
+        ``_ITER_BATCH`` rows per query. Each page resumes below the last
+        (order_column, rowid) seen, so no cursor stays open on the shared
+        connection between pages. ``select`` must return the order column,
+        rowid and payload, in that order.
+        """
+        after = None
+        while True:
+            sql, page_params = select, params
+            if after is not None:
+                sql += f" AND ({order_column}, rowid) < (?, ?)"
+                page_params += after
+            sql += f" ORDER BY {order_column} DESC, rowid DESC LIMIT ?"
+            rows = self.fetchall(sql, page_params + (_ITER_BATCH,))
+            for row in rows:
+                yield _loads(row[2])
+            if len(rows) < _ITER_BATCH:
+                return
+            after = (rows[-1][0], rows[-1][1])
+
+
+def _get_database(cache_dir: Path) -> _Database:
+    db_path = (cache_dir / "storage.db").resolve()
+    with _connections_lock:
+        db = _connections.get(db_path)
+        if db is None:
+            db = _connections[db_path] = _Database(db_path)
+        return db
+
+
+def _open(cache_dir: Path) -> _Database:
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return _get_database(cache_dir)
+    except (OSError, sqlite3.Error) as e:
+        raise StorageError(f"Failed to open storage database in {cache_dir}: {e}")
+
+
+class SQLiteMarketDataCache:
+    """
+    SQLite implementation of the ``MarketDataCache`` interface for market data,
+    price alerts and purchase records.
+    """
+
+    def __init__(self, cache_dir: str = "data"):
+        self.cache_dir = Path(cache_dir)
+        self._db = _open(self.cache_dir)
+
+    @staticmethod
+    def _cache_key(product_name: str, location: str) -> str:
+        return f"{product_name.lower().strip()}\x1f{location.lower().strip()}"
+
+    # Market Data Caching Methods
+
+    def cache_market_data(self, product_name: str, location: str,
+                          price_quotes: List[Dict[str, Any]],
+                          forecast_data: Optional[Dict[str, Any]] = None,
+                          sentiment_data: Optional[Dict[str, Any]] = None) -> None:
+        """Cache market data for a specific product and location"""
+        try:
+            now_ts = time.time()
+            cache_entry = {
+                "product_name": product_name,
+                "location": location,
+                "price_quotes": price_quotes,
+                "forecast_data": forecast_data,
+                "sentiment_data": sentiment_data,
+                "last_updated": datetime.fromtimestamp(now_ts, timezone.utc).isoformat(),
+                "last_updated_ts": now_ts
+            }
+            self._db.execute(
+                "INSERT OR REPLACE INTO market_cache VALUES (?, ?, ?, ?, ?)",
+                (self._cache_key(product_name, location), product_name, location,
+                 cache_entry["last_updated_ts"], _dumps(cache_entry).decode("utf-8"))
+            )
+            logger.info(f"Cached market data for {product_name} at {location}")
+        except Exception as e:
+            raise StorageError(f"Failed to cache market data for {product_name}: {e}")
+
+    def get_market_data_entries(self) -> Dict[str, Dict[str, Any]]:
+        """All cached market data entries keyed by cache key, expired ones included"""
+        try:
+            rows = self._db.fetchall("SELECT cache_key, payload FROM market_cache")
+            return {row[0]: _loads(row[1]) for row in rows}
+        except Exception as e:
+            raise StorageError(f"Failed to read market data cache: {e}")
+
+    def get_cached_market_data(self, product_name: str, location: str,
+                               max_age_hours: int = 24) -> Optional[Dict[str, Any]]:
+        """Retrieve cached market data if it exists and is not expired"""
+        try:
+            row = self._db.fetchone(
+                "SELECT updated_ts, payload FROM market_cache WHERE cache_key = ?",
+                (self._cache_key(product_name, location),)
+            )
+            if row is None:
+                return None
+
+            age_hours = (time.time() - row[0]) / 3600
+            if age_hours > max_age_hours:
+                logger.info(f"Cached data for {product_name} is expired ({age_hours:.1f}h old)")
+                return None
+
+            logger.info(f"Retrieved cached market data for {product_name} at {location}")
+            return _loads(row[1])
+        except Exception as e:
+            logger.error(f"Failed to retrieve cached market data for {product_name}: {e}")
+            return None
+
+    def clear_expired_market_data(self, max_age_hours: int = 168) -> int:
+        """Remove expired market data entries and return how many were removed"""
+        try:
+            cutoff = time.time() - max_age_hours * 3600
+            removed_count = self._db.execute_rowcount(
+                "DELETE FROM market_cache WHERE updated_ts < ?", (cutoff,)
+            )
+            if removed_count > 0:
+                logger.info(f"Removed {removed_count} expired market data entries")
+            return removed_count
+        except Exception as e:
+            raise StorageError(f"Failed to clear expired market data: {e}")
+
+    # Advanced Optimization Features Storage Methods
+
+    @staticmethod
+    def _alert_row(alert: PriceAlert) -> tuple:
+        # created_at must sort exactly like the serialized payload field
+        created_at = alert.model_dump(mode="json", include={"created_at"})["created_at"]
+        return (alert.alert_id, alert.product_name, alert.status,
+                created_at, alert.model_dump_json())
+
+    @staticmethod
+    def _purchase_row(purchase: PurchaseRecord) -> tuple:
+        # purchase_date must sort exactly like the serialized payload field
+        purchase_date = purchase.model_dump(mode="json", include={"purchase_date"})["purchase_date"]
+        return (purchase.purchase_id, purchase.product_name, purchase.supplier,
+                purchase_date, purchase.model_dump_json())
+
+    def save_price_alert(self, alert: PriceAlert) -> None:
+        """Save a price alert to storage"""
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO price_alerts VALUES (?, ?, ?, ?, ?)",
+                self._alert_row(alert)
+            )
+            logger.info(f"Saved price alert: {alert.alert_id}")
+        except Exception as e:
+            raise StorageError(f"Failed to save price alert {alert.alert_id}: {e}")
+
+    def save_price_alerts(self, alerts: List[PriceAlert]) -> None:
+        """Save several price alerts in one transaction"""
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO price_alerts VALUES (?, ?, ?, ?, ?)",
+                [self._alert_row(alert) for alert in alerts]
+            )
+            logger.info(f"Saved {len(alerts)} price alerts")
+        except Exception as e:
+            raise StorageError(f"Failed to save {len(alerts)} price alerts: {e}")
+
+    def list_price_alerts(self, status: Optional[str] = None,
+                          product_name: Optional[str] = None,
+                          limit: int = 20) -> List[Dict[str, Any]]:
+        """List price alerts, newest first, with optional filtering"""
+        try:
+            rows = self._db.fetchall(
+                "SELECT payload FROM price_alerts"
+                " WHERE (? IS NULL OR status = ?) AND (? IS NULL OR product_name = ?)"
+                " ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                (status or None, status, product_name or None, product_name, limit)
+            )
+            return [_loads(row[0]) for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to list price alerts: {e}")
+            return []
+
+    def iter_price_alerts(self, status: Optional[str] = None,
+                          product_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over price alerts, newest first, one small page at a time"""
+        return self._db.iter_pages(
+            "SELECT created_at, rowid, payload FROM price_alerts"
+            " WHERE (? IS NULL OR status = ?) AND (? IS NULL OR product_name = ?)",
+            (status or None, status, product_name or None, product_name),
+            "created_at"
+        )
+
+    def cancel_price_alert(self, alert_id: str) -> bool:
+        """Cancel a price alert; returns False if it does not exist"""
+        try:
+            # Patch the payload in place rather than reading it back
+            updated = self._db.execute_rowcount(
+                "UPDATE price_alerts SET status = 'cancelled',"
+                " payload = json_set(payload, '$.status', 'cancelled', '$.cancelled_at', ?)"
+                " WHERE alert_id = ?",
+                (datetime.now(timezone.utc).isoformat(), alert_id)
+            )
+            if not updated:
+                return False
+            logger.info(f"Cancelled price alert: {alert_id}")
+            return True
+        except Exception as e:
+            raise StorageError(f"Failed to cancel price alert {alert_id}: {e}")
+
+    def save_purchase_record(self, purchase: PurchaseRecord) -> None:
+        """Save a purchase record to storage"""
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO purchase_records VALUES (?, ?, ?, ?, ?)",
+                self._purchase_row(purchase)
+            )
+            logger.info(f"Saved purchase record: {purchase.purchase_id}")
+        except Exception as e:
+            raise StorageError(f"Failed to save purchase record {purchase.purchase_id}: {e}")
+
+    def save_purchase_records(self, purchases: List[PurchaseRecord]) -> None:
+        """Save several purchase records in one transaction"""
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO purchase_records VALUES (?, ?, ?, ?, ?)",
+                [self._purchase_row(purchase) for purchase in purchases]
+            )
+            logger.info(f"Saved {len(purchases)} purchase records")
+        except Exception as e:
+            raise StorageError(f"Failed to save {len(purchases)} purchase records: {e}")
+
+    def get_purchase_history(self, product_name: str,
+                             limit: int = 50,
+                             supplier: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get purchase history for a product, newest purchase first"""
+        try:
+            rows = self._db.fetchall(
+                "SELECT payload FROM purchase_records"
+                " WHERE product_name = ? AND (? IS NULL OR supplier = ?)"
+                " ORDER BY purchase_date DESC, rowid DESC LIMIT ?",
+                (product_name, supplier or None, supplier, limit)
+            )
+            return [_loads(row[0]) for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to get purchase history for {product_name}: {e}")
+            return []
+
+    def iter_purchase_history(self, product_name: str,
+                              supplier: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over purchase history for a product, newest first, one small page at a time"""
+        return self._db.iter_pages(
+            "SELECT purchase_date, rowid, payload FROM purchase_records"
+            " WHERE product_name = ? AND (? IS NULL OR supplier = ?)",
+            (product_name, supplier or None, supplier),
+            "purchase_date"
+        )
+
+
+class SQLiteSessionStorage:
+    """SQLite implementation of the ``SessionStorage`` interface"""
+
+    def __init__(self, cache_dir: str = "data"):
+        self.cache_dir = Path(cache_dir)
+        self._db = _open(self.cache_dir)
+
+    def generate_session_id(self) -> str:
+        """Generate a unique session ID"""
+        return str(uuid.uuid4())
+
+    def save_analysis_session(self, session_id: str, analysis_response: AnalyzeResponse) -> None:
+        """Save complete analysis results for a session"""
+        try:
+            now_ts = time.time()
+            now_iso = datetime.fromtimestamp(now_ts, timezone.utc).isoformat()
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (session_id, now_iso, now_ts, now_iso,
+                 len(analysis_response.product_analyses),
+                 analysis_response.overall_budget.target,
+                 analysis_response.model_dump_json())
+            )
+            logger.info(f"Saved analysis session: {session_id}")
+        except Exception as e:
+            raise StorageError(f"Failed to save analysis session {session_id}: {e}")
+
+    def get_analysis_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve analysis results for a session and mark it as accessed"""
+        try:
+            last_accessed = datetime.now(timezone.utc).isoformat()
+            with self._db.lock:
+                row = self._db.fetchone(
+                    "SELECT created_at, created_ts, payload FROM sessions WHERE session_id = ?",
+                    (session_id,)
+                )
+                if row is None:
+                    return None
+                self._db.execute(
+                    "UPDATE sessions SET last_accessed = ? WHERE session_id = ?",
+                    (last_accessed, session_id)
+                )
+
+            logger.info(f"Retrieved analysis session: {session_id}")
+            return {
+                "session_id": session_id,
+                "analysis_response": _loads(row[2]),
+                "created_at": row[0],
+                "created_ts": row[1],
+                "last_accessed": last_accessed
+            }
+        except Exception as e:
+            logger.error(f"Failed to retrieve analysis session {session_id}: {e}")
+            return None
+
+    def get_analysis_session_json(self, session_id: str) -> Optional[bytes]:
+        """Retrieve a session's analysis response as raw JSON and mark it as accessed"""
+        try:
+            last_accessed = datetime.now(timezone.utc).isoformat()
+            with self._db.lock:
+                row = self._db.fetchone(
+                    "SELECT payload FROM sessions WHERE session_id = ?", (session_id,)
+                )
+                if row is None:
+                    return None
+                self._db.execute(
+                    "UPDATE sessions SET last_accessed = ? WHERE session_id = ?",
+                    (last_accessed, session_id)
+                )
+
+            logger.info(f"Retrieved analysis session: {session_id}")
+            return row[0].encode('utf-8')
+        except Exception as e:
+            logger.error(f"Failed to retrieve analysis session {session_id}: {e}")
+            return None
+
+    def flush_access_times(self) -> None:
+        """Access times are written directly, so there is nothing to flush"""
+
+    def list_sessions(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """List session summaries, newest first"""
+        try:
+            rows = self._db.fetchall(
+                "SELECT session_id, created_at, last_accessed, product_count, total_budget"
+                " FROM sessions ORDER BY created_ts DESC LIMIT ?",
+                (limit,)
+            )
+            return [
+                {
+                    "session_id": row[0],
+                    "created_at": row[1],
+                    "last_accessed": row[2],
+                    "product_count": row[3],
+                    "total_budget": row[4]
+                }
+                for row in rows
+            ]
+        except Exception as e:
+            logger.error(f"Failed to list sessions: {e}")
+            return []
+
+    def count_sessions(self) -> int:
+        """Number of stored analysis sessions"""
+        try:
+            return self._db.fetchone("SELECT COUNT(*) FROM sessions")[0]
+        except Exception as e:
+            logger.error(f"Failed to count sessions: {e}")
+            return 0
+
+    def get_recent_budget_targets(self, limit: int = 10) -> List[float]:
+        """Overall budget targets of the most recent sessions, newest first"""
+        try:
+            rows = self._db.fetchall(
+                "SELECT total_budget FROM sessions ORDER BY created_ts DESC LIMIT ?",
+                (limit,)
+            )
+            return [row[0] for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to read recent budget targets: {e}")
+            return []
+
+    def delete_session(self, session_id: str) -> bool:
+        """Delete a session; returns False if it does not exist"""
+        try:
+            deleted = self._db.execute_rowcount(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+            )
+            if not deleted:
+                return False
+            logger.info(f"Deleted analysis session: {session_id}")
+            return True
+        except Exception as e:
+            raise StorageError(f"Failed to delete analysis session {session_id}: {e}")
+
+    def cleanup_old_sessions(self, max_age_days: int = 30) -> int:
+        """Remove sessions older than ``max_age_days`` and return how many were removed"""
+        try:
+            cutoff = time.time() - max_age_days * 24 * 3600
+            removed_count = self._db.execute_rowcount(
+                "DELETE FROM sessions WHERE created_ts < ?", (cutoff,)
+            )
+            if removed_count > 0:
+                logger.info(f"Removed {removed_count} old analysis sessions")
+            return removed_count
+        except Exception as e:
+            raise StorageError(f"Failed to cleanup old sessions: {e}")
+
+
+def import_json_storage(cache_dir: str = "data") -> Dict[str, int]:
+    """
+    Copy everything the JSON backend stored in ``cache_dir`` into the SQLite
+    database in the same directory and return how many records of each kind
+    were imported. Rows with the same ids are replaced, so it can be re-run.
+    """
+    from .storage import MarketDataCache, SessionStorage
+
+    json_cache = MarketDataCache(cache_dir)
+    json_sessions = SessionStorage(cache_dir)
+    sqlite_cache = SQLiteMarketDataCache(cache_dir)
+    db = sqlite_cache._db
+
+    market_rows = []
+    for entry in json_cache.get_market_data_entries().values():
+        updated_ts = _entry_timestamp(entry, "last_updated_ts", "last_updated")
+        if updated_ts is None or "product_name" not in entry or "location" not in entry:
+            continue
+        market_rows.append((sqlite_cache._cache_key(entry["product_name"], entry["location"]),
+                            entry["product_name"], entry["location"], updated_ts,
+                            _dumps(entry).decode("utf-8")))
+    db.executemany("INSERT OR REPLACE INTO market_cache VALUES (?, ?, ?, ?, ?)", market_rows)
+
+    # Columns come from the validated model; the payload is copied as stored
+    # so fields added by updates, like cancelled_at, are kept
+    alert_rows = [
+        sqlite_cache._alert_row(PriceAlert.model_validate(alert))[:4]
+        + (_dumps(alert).decode("utf-8"),)
+        for alert in json_cache._alerts.values()
+    ]
+    db.executemany("INSERT OR REPLACE INTO price_alerts VALUES (?, ?, ?, ?, ?)", alert_rows)
+
+    purchase_rows = [
+        sqlite_cache._purchase_row(PurchaseRecord.model_validate(purchase))[:4]
+        + (_dumps(purchase).decode("utf-8"),)
+        for purchase in json_cache._purchases.values()
+    ]
+    db.executemany("INSERT OR REPLACE INTO purchase_records VALUES (?, ?, ?, ?, ?)", purchase_rows)
+
+    session_rows = []
+    for summary in json_sessions._sessions.values():
+        session_id = summary["session_id"]
+        try:
+            payload = json_sessions._payload_file(session_id).read_text(encoding="utf-8")
+        except (OSError, StorageError) as e:
+            logger.warning(f"Skipping session {session_id} without a readable payload: {e}")
+            continue
+        created_ts = _entry_timestamp(summary, "created_ts", "created_at") or time.time()
+        session_rows.append((session_id, summary.get("created_at"), created_ts,
+                             summary.get("last_accessed") or summary.get("created_at"),
+                             summary.get("product_count", 0), summary.get("total_budget", 0),
+                             payload))
+    db.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)", session_rows)
+
+    counts = {
+        "market_data": len(market_rows),
+        "price_alerts": len(alert_rows),
+        "purchase_records": len(purchase_rows),
+        "sessions": len(session_rows)
+    }
+    logger.info(f"Imported JSON storage from {cache_dir} into SQLite: {counts}")
+    return counts
+
+
+if __name__ == "__main__":
+    print(import_json_storage(sys.argv[1] if len(sys.argv) > 1 else "data"))
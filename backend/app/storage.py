@@ -1,24 +1,557 @@
+import bisect
+import copy
+import hashlib
 import json
 import os
+import threading
+import time
 import uuid
+import weakref
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from functools import cached_property
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Any, Tuple, Union
 from pathlib import Path
 import logging
 from contextlib import contextmanager
 
+from pydantic import TypeAdapter, ValidationError
+
 from .models import (
     PriceAnalysis, ProductAnalysisResult, AnalyzeResponse,
     SupplierRecommendation, OptimizationRecommendation,
     PriceAlert, PurchaseRecord
 )
 
+if TYPE_CHECKING:  # pragma: no cover - the SQLite backend imports this module
+    from .sqlite_storage import SQLiteMarketDataCache, SQLiteSessionStorage
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
 logger = logging.getLogger(__name__)
 
+
+def _dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option, default=str)
+    return json.dumps(data, indent=2 if indent else None,
+                      ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _loads(content: bytes) -> Any:
+    """Parse JSON bytes; both parsers raise json.JSONDecodeError on bad input"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
 class StorageError(Exception):
     """Custom exception for storage operations"""
     pass
 
+
+_fdatasync = getattr(os, 'fdatasync', os.fsync)
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Flush a directory entry so a rename or new file survives a crash"""
+    if os.name == 'nt':  # pragma: no cover - directories cannot be opened on Windows
+        return
+    dir_fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+@contextmanager
+def _locked(lock_file: Path, exclusive: bool = True):
+    """
+    Hold an advisory lock on a sidecar file for cross-process protection.
+
+    Readers take a shared lock and writers an exclusive one. Locks are tied to
+    the open file, so they must not be nested for the same path. Windows only
+    has exclusive byte-range locks, which are used for both.
+    """
+    fd = os.open(str(lock_file), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(file_path: Path, payload: bytes, durable: bool = True,
+                  temp_file: Optional[Path] = None) -> None:
+    """
+    Replace a file by writing a temp file and renaming it over the target.
+    
+    With ``durable`` the temp file is fsynced before the rename and the
+    directory after it, so a crash leaves either the old or the new file.
+    Callers writing the same file repeatedly can pass its precomputed temp path.
+    """
+    if temp_file is None:
+        temp_file = file_path.with_suffix('.tmp')
+    try:
+        with open(temp_file, 'wb') as f:
+            f.write(payload)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        temp_file.replace(file_path)
+        if durable:
+            _fsync_dir(file_path.parent)
+    except BaseException:
+        if temp_file.exists():
+            temp_file.unlink()
+        raise
+
+
+def _entry_timestamp(entry: Dict[str, Any], ts_field: str, iso_field: str) -> Optional[float]:
+    """
+    Epoch seconds for an entry, or None if it has no usable timestamp.
+    
+    The ISO string is only parsed for entries written before the numeric
+    field was stored alongside it.
+    """
+    ts = entry.get(ts_field)
+    if ts is not None:
+        return ts
+    try:
+        return datetime.fromisoformat(entry[iso_field]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+_DATETIME = TypeAdapter(datetime)
+
+
+def _normalize_created_at(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Re-serialize ``created_at`` the way pydantic's JSON mode does.
+    
+    Legacy files were written with ``str(datetime)``, whose space separator
+    sorts before the ``T`` of every record saved since.
+    """
+    value = record.get("created_at")
+    if isinstance(value, str):
+        try:
+            record["created_at"] = _DATETIME.dump_python(_DATETIME.validate_python(value), mode="json")
+        except ValidationError:
+            pass
+    return record
+
+
+# A log is rewritten from its index once it holds more than twice as many
+# lines as live records, but never while it is this short.
+_COMPACT_MIN_LINES = 64
+
+
+class _RecordLog:
+    """
+    Append-only JSONL log with an in-memory index of the latest record per id.
+
+    Every mutation appends one line; the last line for an id wins, a line
+    carrying ``"_patch"`` merges those fields into the current record and a
+    line carrying ``"_deleted": true`` removes it. The file is rewritten from
+    the index once stale lines outnumber live records.
+
+    Durable writes are group-committed: the line is appended under the lock
+    but synced after it is released, and one fdatasync covers every line
+    appended before it started, so concurrent writers share a sync.
+
+    With ``order_field`` the ids are also kept sorted on that field so the
+    newest records can be listed without sorting the whole index.
+    ``normalize`` is applied to each record migrated from ``legacy_path``.
+    """
+
+    def __init__(self, path: Path, key_field: str, legacy_path: Optional[Path] = None,
+                 order_field: Optional[str] = None,
+                 normalize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.path = path
+        self.key_field = key_field
+        self.order_field = order_field
+        # (order value, -insertion seq, id) ascending; the negated sequence
+        # keeps ties in insertion order when walked from the end
+        self._order: List[Tuple[Any, int, str]] = []
+        self._order_keys: Dict[str, Tuple[Any, int, str]] = {}
+        self._next_seq = 0
+        self._lock = threading.RLock()
+        # Paths used on every operation, derived once
+        self._path_str = str(path)
+        self._temp_file = path.with_suffix('.tmp')
+        self._lock_file = path.with_suffix(path.suffix + '.lock')
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._lines = 0
+        self._size = 0
+        # Bytes appended by this instance, and how many of those are synced
+        self._appended = 0
+        self._synced = 0
+        self._sync_lock = threading.Lock()
+
+        with _locked(self._lock_file):
+            if legacy_path is not None and legacy_path.exists() and not path.exists():
+                self._migrate(legacy_path, normalize)
+            self._load()
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        return _dumps(record) + b"\n"
+
+    def _migrate(self, legacy_path: Path,
+                 normalize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> None:
+        """Convert a legacy ``{id: record}`` JSON file into a log"""
+        try:
+            with open(legacy_path, 'rb') as f:
+                content = f.read().strip()
+            records = _loads(content) if content else {}
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid JSON in {legacy_path}, not migrating: {e}")
+            return
+        migrated = records.values()
+        if normalize is not None:
+            migrated = [normalize(record) for record in migrated]
+        self._rewrite(migrated)
+        legacy_path.rename(legacy_path.with_name(legacy_path.name + '.migrated'))
+        logger.info(f"Migrated {len(records)} records from {legacy_path} to {self.path}")
+
+    def _load(self) -> None:
+        """Rebuild the index by replaying the log from the start"""
+        index: Dict[str, Dict[str, Any]] = {}
+        lines = 0
+        size = 0
+        if self.path.exists():
+            with open(self.path, 'rb') as f:
+                for raw in f:
+                    size += len(raw)
+                    if not raw.strip():
+                        continue
+                    try:
+                        record = _loads(raw)
+                    except json.JSONDecodeError:
+                        # A torn tail write from a crash; the record is lost
+                        logger.warning(f"Skipping unreadable line in {self.path}")
+                        continue
+                    lines += 1
+                    record_id = record.get(self.key_field)
+                    if record_id is None:
+                        continue
+                    if record.get("_deleted"):
+                        index.pop(record_id, None)
+                    elif "_patch" in record:
+                        current = index.get(record_id)
+                        if current is not None:
+                            index[record_id] = {**current, **record["_patch"]}
+                    else:
+                        index[record_id] = record
+        self._index = index
+        self._lines = lines
+        self._size = size
+        self._rebuild_order()
+
+    def _order_key(self, record_id: str, record: Dict[str, Any], seq: int) -> Tuple[Any, int, str]:
+        return (record.get(self.order_field) or "", -seq, record_id)
+
+    def _rebuild_order(self) -> None:
+        if self.order_field is None:
+            return
+        self._order_keys = {
+            record_id: self._order_key(record_id, record, seq)
+            for seq, (record_id, record) in enumerate(self._index.items())
+        }
+        self._order = sorted(self._order_keys.values())
+        self._next_seq = len(self._order)
+
+    def _unorder(self, record_id: str) -> Optional[int]:
+        """Drop an id from the sorted order; returns its insertion seq"""
+        key = self._order_keys.pop(record_id, None)
+        if key is None:
+            return None
+        del self._order[bisect.bisect_left(self._order, key)]
+        return -key[1]
+
+    def _set(self, record: Dict[str, Any]) -> None:
+        record_id = record[self.key_field]
+        self._index[record_id] = record
+        if self.order_field is not None:
+            # An updated record keeps its insertion position, as in the dict
+            seq = self._unorder(record_id)
+            if seq is None:
+                seq = self._next_seq
+                self._next_seq += 1
+            key = self._order_key(record_id, record, seq)
+            self._order_keys[record_id] = key
+            bisect.insort(self._order, key)
+
+    def _discard(self, record_id: str) -> None:
+        del self._index[record_id]
+        if self.order_field is not None:
+            self._unorder(record_id)
+
+    def _is_stale(self) -> bool:
+        """Whether another writer has changed the log since it was replayed"""
+        try:
+            size = os.stat(self._path_str).st_size
+        except FileNotFoundError:
+            size = 0
+        return size != self._size
+
+    def _refresh(self) -> None:
+        if self._is_stale():
+            with _locked(self._lock_file, exclusive=False):
+                self._load()
+
+    def _append_line(self, line: bytes, count: int = 1) -> int:
+        """Append ``count`` lines without syncing; returns the mark to sync through"""
+        created = not self.path.exists()
+        with open(self._path_str, 'ab') as f:
+            f.write(line)
+        if created:
+            _fsync_dir(self.path.parent)
+        self._lines += count
+        self._size += len(line)
+        self._appended += len(line)
+        return self._appended
+
+    def _sync_through(self, mark: int) -> None:
+        """Wait until this instance's appends up to ``mark`` are on disk"""
+        with self._sync_lock:
+            if self._synced >= mark:
+                # Covered by a sync that ran while this writer was queued
+                return
+            target = self._appended
+            fd = os.open(self._path_str, os.O_WRONLY | os.O_APPEND)
+            try:
+                _fdatasync(fd)
+            finally:
+                os.close(fd)
+            self._synced = target
+
+    def _rewrite(self, records) -> int:
+        payload = b"".join(self._encode(record) for record in records)
+        _atomic_write(self.path, payload, temp_file=self._temp_file)
+        return len(payload)
+
+    @contextmanager
+    def _writing(self):
+        """Exclusively lock the log and catch up with other writers first"""
+        with self._lock, _locked(self._lock_file):
+            if self._is_stale():
+                self._load()
+            yield
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return self._index.get(record_id)
+
+    def values(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return list(self._index.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def newest(self, limit: int,
+               match: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """
+        Up to ``limit`` records by ``order_field`` descending, equal values in
+        insertion order, optionally filtered by ``match``. The walk stops as
+        soon as enough records match.
+        """
+        with self._lock:
+            self._refresh()
+            result: List[Dict[str, Any]] = []
+            if limit <= 0:
+                return result
+            for _, _, record_id in reversed(self._order):
+                record = self._index[record_id]
+                if match is None or match(record):
+                    result.append(record)
+                    if len(result) >= limit:
+                        break
+            return result
+
+    def iter_newest(self, match: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                    batch: int = 64) -> Iterator[Dict[str, Any]]:
+        """
+        Lazy form of ``newest`` without a limit. Records are taken ``batch``
+        at a time under the lock, each batch resuming below the last order
+        key seen, so the caller can stop early without the walk going on.
+        Records written while iterating may or may not be seen.
+        """
+        bound = None
+        while True:
+            with self._lock:
+                self._refresh()
+                end = len(self._order) if bound is None else bisect.bisect_left(self._order, bound)
+                start = max(0, end - batch)
+                keys = self._order[start:end]
+                records = [self._index[key[2]] for key in keys]
+            for record in reversed(records):
+                if match is None or match(record):
+                    yield record
+            if start == 0:
+                return
+            bound = keys[0]
+
+    def put(self, record: Dict[str, Any], durable: bool = True) -> None:
+        """Append a record; ``durable=False`` skips the fdatasync"""
+        with self._writing():
+            mark = self._append_line(self._encode(record))
+            self._set(record)
+            self._maybe_compact()
+        if durable:
+            self._sync_through(mark)
+
+    def put_json(self, raw: bytes, durable: bool = True) -> None:
+        """Append a record that is already serialized, e.g. by model_dump_json()"""
+        record = _loads(raw)
+        with self._writing():
+            mark = self._append_line(raw + b"\n")
+            self._set(record)
+            self._maybe_compact()
+        if durable:
+            self._sync_through(mark)
+
+    def put_many_json(self, raws: List[bytes], durable: bool = True) -> None:
+        """Append several serialized records with one write and one sync"""
+        records = [_loads(raw) for raw in raws]
+        if not records:
+            return
+        with self._writing():
+            mark = self._append_line(b"".join(raw + b"\n" for raw in raws), len(records))
+            for record in records:
+                self._set(record)
+            self._maybe_compact()
+        if durable:
+            self._sync_through(mark)
+
+    def update(self, record_id: str, changes: Dict[str, Any], durable: bool = True) -> bool:
+        """
+        Merge ``changes`` into a record by appending only the changed fields.
+        Returns False if the record does not exist.
+        """
+        with self._writing():
+            record = self._index.get(record_id)
+            if record is None:
+                return False
+            mark = self._append_line(self._encode({self.key_field: record_id, "_patch": changes}))
+            self._set({**record, **changes})
+            self._maybe_compact()
+        if durable:
+            self._sync_through(mark)
+        return True
+
+    def delete(self, record_id: str) -> bool:
+        with self._writing():
+            if record_id not in self._index:
+                return False
+            mark = self._append_line(self._encode({self.key_field: record_id, "_deleted": True}))
+            self._discard(record_id)
+            self._maybe_compact()
+        self._sync_through(mark)
+        return True
+
+    def retain(self, keep: Callable[[Dict[str, Any]], bool]) -> List[str]:
+        """
+        Drop every record for which ``keep`` is false in one compaction pass
+        instead of a tombstone per record. Returns the removed ids.
+        """
+        with self._writing():
+            removed = [record_id for record_id, record in self._index.items()
+                       if not keep(record)]
+            if removed:
+                for record_id in removed:
+                    self._discard(record_id)
+                self._compact()
+            return removed
+
+    def _maybe_compact(self) -> None:
+        if self._lines > _COMPACT_MIN_LINES and self._lines > 2 * len(self._index):
+            self._compact()
+
+    def _compact(self) -> None:
+        self._size = self._rewrite(self._index.values())
+        self._lines = len(self._index)
+        # The rewrite is synced and contains everything appended so far
+        self._synced = self._appended
+
+    def compact(self) -> None:
+        """Atomically rewrite the log so it holds one line per live record"""
+        with self._writing():
+            self._compact()
+
+
+# Parsed JSON files keyed by path, with the (mtime_ns, size) stamp of the
+# file they were read from so writes by other processes are seen; shared by
+# every MarketDataCache instance. Cached dicts are never handed out directly.
+_json_cache: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+# One log per file in this process, so request-scoped storage instances do
+# not each lock, migrate and replay it
+_shared_logs: Dict[Path, _RecordLog] = {}
+_shared_logs_lock = threading.Lock()
+
+
+def _shared_log(path: Path, key_field: str, legacy_path: Optional[Path] = None,
+                order_field: Optional[str] = None,
+                normalize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> _RecordLog:
+    """The process-wide log for ``path``, replayed on first use"""
+    key = path.resolve()
+    with _shared_logs_lock:
+        log = _shared_logs.get(key)
+        if log is None:
+            try:
+                log = _RecordLog(path, key_field, legacy_path=legacy_path,
+                                 order_field=order_field, normalize=normalize)
+            except Exception as e:
+                raise StorageError(f"Failed to load {path}: {e}")
+            _shared_logs[key] = log
+        return log
+
+
+def _alert_filter(status: Optional[str],
+                  product_name: Optional[str]) -> Callable[[Dict[str, Any]], bool]:
+    def matches(alert_dict: Dict[str, Any]) -> bool:
+        return ((not status or alert_dict.get("status") == status)
+                and (not product_name or alert_dict.get("product_name") == product_name))
+    return matches
+
+
+def _purchase_filter(product_name: str,
+                     supplier: Optional[str]) -> Callable[[Dict[str, Any]], bool]:
+    def matches(purchase_dict: Dict[str, Any]) -> bool:
+        return (purchase_dict.get("product_name") == product_name
+                and (not supplier or purchase_dict.get("supplier") == supplier))
+    return matches
+
+
 class MarketDataCache:
     """
     Handles caching of market data including price quotes and analysis results.
@@ -28,15 +561,32 @@ class MarketDataCache:
     def __init__(self, cache_dir: str = "data"):
         self.cache_dir = Path(cache_dir)
         self.market_data_file = self.cache_dir / "market_data_cache.json"
-        self.analysis_results_file = self.cache_dir / "analysis_results.json"
-        self.price_alerts_file = self.cache_dir / "price_alerts.json"
-        self.purchase_records_file = self.cache_dir / "purchase_records.json"
+        self.price_alerts_file = self.cache_dir / "price_alerts.jsonl"
+        self.purchase_records_file = self.cache_dir / "purchase_records.jsonl"
+        
+        # (temp, lock) sidecar paths per managed file, derived once
+        self._sidecars: Dict[Path, Tuple[Path, Path]] = {}
         
         # Ensure cache directory exists
         self._ensure_cache_directory()
         
         # Initialize cache files if they don't exist
         self._initialize_cache_files()
+        
+    # Alerts and purchases are append-only logs, migrated from the
+    # whole-file JSON layout on first use and shared by every instance
+    
+    @cached_property
+    def _alerts(self) -> _RecordLog:
+        return _shared_log(self.price_alerts_file, "alert_id",
+                           legacy_path=self.cache_dir / "price_alerts.json",
+                           order_field="created_at", normalize=_normalize_created_at)
+    
+    @cached_property
+    def _purchases(self) -> _RecordLog:
+        return _shared_log(self.purchase_records_file, "purchase_id",
+                           legacy_path=self.cache_dir / "purchase_records.json",
+                           order_field="purchase_date")
     
     def _ensure_cache_directory(self) -> None:
         """Create cache directory if it doesn't exist"""
@@ -52,80 +602,102 @@ class MarketDataCache:
             if not self.market_data_file.exists():
                 self._write_json_file(self.market_data_file, {})
                 logger.info(f"Initialized market data cache file: {self.market_data_file}")
-            
-            if not self.analysis_results_file.exists():
-                self._write_json_file(self.analysis_results_file, {})
-                logger.info(f"Initialized analysis results file: {self.analysis_results_file}")
-            
-            if not self.price_alerts_file.exists():
-                self._write_json_file(self.price_alerts_file, {})
-                logger.info(f"Initialized price alerts file: {self.price_alerts_file}")
-            
-            if not self.purchase_records_file.exists():
-                self._write_json_file(self.purchase_records_file, {})
-                logger.info(f"Initialized purchase records file: {self.purchase_records_file}")
         except Exception as e:
             raise StorageError(f"Failed to initialize cache files: {e}")
     
-    @contextmanager
-    def _file_lock(self, file_path: Path):
-        """Simple file locking mechanism for concurrent access protection"""
-        lock_file = file_path.with_suffix(file_path.suffix + '.lock')
-        try:
-            # Create lock file
-            lock_file.touch()
-            yield
-        finally:
-            # Remove lock file
-            if lock_file.exists():
-                lock_file.unlink()
+    def _sidecar_paths(self, file_path: Path) -> Tuple[Path, Path]:
+        """Temp and lock file paths for a managed file"""
+        paths = self._sidecars.get(file_path)
+        if paths is None:
+            paths = (file_path.with_suffix('.tmp'),
+                     file_path.with_suffix(file_path.suffix + '.lock'))
+            self._sidecars[file_path] = paths
+        return paths
+    
+    def _file_lock(self, file_path: Path, exclusive: bool = True):
+        """Advisory lock on a sidecar file; shared for readers, exclusive for writers"""
+        return _locked(self._sidecar_paths(file_path)[1], exclusive)
     
     def _read_json_file(self, file_path: Path) -> Dict[str, Any]:
         """Safely read JSON file with error handling"""
+        stamp = None
         try:
-            with self._file_lock(file_path):
-                if not file_path.exists():
+            with self._file_lock(file_path, exclusive=False):
+                try:
+                    st = file_path.stat()
+                except FileNotFoundError:
                     return {}
+                stamp = (st.st_mtime_ns, st.st_size)
+                
+                cached = _json_cache.get(file_path)
+                if cached is None or cached[0] != stamp:
+                    with open(file_path, 'rb') as f:
+                        content = f.read().strip()
+                    data = _loads(content) if content else {}
+                    cached = (stamp, data)
+                    _json_cache[file_path] = cached
                 
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if not content:
-                        return {}
-                    return json.loads(content)
+                # Callers mutate the top level before writing it back
+                return dict(cached[1])
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON in {file_path}: {e}")
             # Backup corrupted file and return empty dict
-            backup_path = file_path.with_suffix(f'.backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
-            file_path.rename(backup_path)
-            logger.info(f"Corrupted file backed up to: {backup_path}")
+            self._recover_corrupt_file(file_path, stamp)
             return {}
         except Exception as e:
             raise StorageError(f"Failed to read {file_path}: {e}")
     
-    def _write_json_file(self, file_path: Path, data: Dict[str, Any]) -> None:
-        """Safely write JSON file with error handling"""
+    def _recover_corrupt_file(self, file_path: Path, stamp: Tuple[int, int]) -> None:
+        """
+        Keep a corrupted file as a backup and put an empty one in its place.
+        
+        The backup is a hard link, so no data is copied and the path never goes
+        missing; the empty file is cached so later reads skip the disk.
+        """
         try:
             with self._file_lock(file_path):
-                # Write to temporary file first, then rename for atomic operation
-                temp_file = file_path.with_suffix('.tmp')
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+                st = file_path.stat()
+                if (st.st_mtime_ns, st.st_size) != stamp:
+                    # Already recovered by another reader, or rewritten since
+                    _json_cache.pop(file_path, None)
+                    return
                 
-                # Atomic rename
-                temp_file.replace(file_path)
+                backup_path = file_path.with_suffix(f'.backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
+                try:
+                    os.link(file_path, backup_path)
+                except OSError:
+                    # Filesystems without hard links, or a backup from the same second
+                    file_path.replace(backup_path)
+                _atomic_write(file_path, b"{}", durable=False,
+                              temp_file=self._sidecar_paths(file_path)[0])
+                st = file_path.stat()
+                _json_cache[file_path] = ((st.st_mtime_ns, st.st_size), {})
+            logger.info(f"Corrupted file backed up to: {backup_path}")
+        except OSError as e:
+            _json_cache.pop(file_path, None)
+            logger.error(f"Failed to back up corrupted file {file_path}: {e}")
+    
+    def _write_json_file(self, file_path: Path, data: Dict[str, Any],
+                         durable: bool = True) -> None:
+        """Safely write JSON file with error handling; see _atomic_write for ``durable``"""
+        try:
+            with self._file_lock(file_path):
+                # Encode up front so the payload goes out in one write() and
+                # an unserializable value never leaves a truncated temp file
+                _atomic_write(file_path, _dumps(data, indent=True), durable,
+                              temp_file=self._sidecar_paths(file_path)[0])
+                st = file_path.stat()
+                _json_cache[file_path] = ((st.st_mtime_ns, st.st_size), data)
                 logger.debug(f"Successfully wrote data to {file_path}")
         except Exception as e:
-            # Clean up temp file if it exists
-            temp_file = file_path.with_suffix('.tmp')
-            if temp_file.exists():
-                temp_file.unlink()
+            _json_cache.pop(file_path, None)
             raise StorageError(f"Failed to write {file_path}: {e}")
     
     def _generate_product_hash(self, product_name: str, location: str) -> str:
         """Generate a consistent hash for product + location combination"""
-        import hashlib
-        key = f"{product_name.lower().strip()}_{location.lower().strip()}"
-        return hashlib.md5(key.encode()).hexdigest()
+        # A unit separator cannot occur in either name, unlike "_"
+        key = f"{product_name.lower().strip()}\x1f{location.lower().strip()}"
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
     
     # Market Data Caching Methods
     
@@ -147,22 +719,32 @@ class MarketDataCache:
             product_hash = self._generate_product_hash(product_name, location)
             cache_data = self._read_json_file(self.market_data_file)
             
+            now_ts = time.time()
             cache_entry = {
                 "product_name": product_name,
                 "location": location,
                 "price_quotes": price_quotes,
                 "forecast_data": forecast_data,
                 "sentiment_data": sentiment_data,
-                "last_updated": datetime.now(timezone.utc).isoformat()
+                "last_updated": datetime.fromtimestamp(now_ts, timezone.utc).isoformat(),
+                "last_updated_ts": now_ts
             }
             
             cache_data[product_hash] = cache_entry
-            self._write_json_file(self.market_data_file, cache_data)
+            # Cache entries can be refetched, so skip the fsyncs
+            self._write_json_file(self.market_data_file, cache_data, durable=False)
             
             logger.info(f"Cached market data for {product_name} at {location}")
         except Exception as e:
             raise StorageError(f"Failed to cache market data for {product_name}: {e}")
     
+    def get_market_data_entries(self) -> Dict[str, Dict[str, Any]]:
+        """
+        All cached market data entries keyed by product hash, expired ones
+        included.
+        """
+        return copy.deepcopy(self._read_json_file(self.market_data_file))
+    
     def get_cached_market_data(self, product_name: str, location: str, 
                               max_age_hours: int = 24) -> Optional[Dict[str, Any]]:
         """
@@ -184,15 +766,18 @@ class MarketDataCache:
                 return None
             
             entry = cache_data[product_hash]
-            last_updated = datetime.fromisoformat(entry["last_updated"])
-            age_hours = (datetime.now(timezone.utc) - last_updated).total_seconds() / 3600
+            last_updated = _entry_timestamp(entry, "last_updated_ts", "last_updated")
+            if last_updated is None:
+                return None
+            age_hours = (time.time() - last_updated) / 3600
             
             if age_hours > max_age_hours:
                 logger.info(f"Cached data for {product_name} is expired ({age_hours:.1f}h old)")
                 return None
             
             logger.info(f"Retrieved cached market data for {product_name} at {location}")
-            return entry
+            # The entry is shared with the file cache; callers get their own copy
+            return copy.deepcopy(entry)
         except Exception as e:
             logger.error(f"Failed to retrieve cached market data for {product_name}: {e}")
             return None
@@ -209,27 +794,20 @@ class MarketDataCache:
         """
         try:
             cache_data = self._read_json_file(self.market_data_file)
-            current_time = datetime.now(timezone.utc)
-            removed_count = 0
+            cutoff = time.time() - max_age_hours * 3600
             
-            keys_to_remove = []
+            # Entries with missing or invalid timestamps are removed too
+            survivors = {}
             for key, entry in cache_data.items():
-                try:
-                    last_updated = datetime.fromisoformat(entry["last_updated"])
-                    age_hours = (current_time - last_updated).total_seconds() / 3600
-                    
-                    if age_hours > max_age_hours:
-                        keys_to_remove.append(key)
-                except (KeyError, ValueError):
-                    # Remove entries with invalid timestamps
-                    keys_to_remove.append(key)
-            
-            for key in keys_to_remove:
-                del cache_data[key]
-                removed_count += 1
+                last_updated = _entry_timestamp(entry, "last_updated_ts", "last_updated")
+                if last_updated is not None and last_updated >= cutoff:
+                    survivors[key] = entry
+            removed_count = len(cache_data) - len(survivors)
             
             if removed_count > 0:
-                self._write_json_file(self.market_data_file, cache_data)
+                # One rewrite for the whole batch; cache entries can be
+                # refetched, so skip the fsyncs
+                self._write_json_file(self.market_data_file, survivors, durable=False)
                 logger.info(f"Removed {removed_count} expired market data entries")
             
             return removed_count
@@ -246,17 +824,25 @@ class MarketDataCache:
             alert: PriceAlert object to save
         """
         try:
-            alerts_data = self._read_json_file(self.price_alerts_file)
-            
-            # Convert Pydantic model to dict for JSON serialization
-            alert_dict = alert.model_dump()
-            alerts_data[alert.alert_id] = alert_dict
-            
-            self._write_json_file(self.price_alerts_file, alerts_data)
+            # Serialized by pydantic directly; the index parses the same bytes
+            self._alerts.put_json(alert.model_dump_json().encode('utf-8'))
             logger.info(f"Saved price alert: {alert.alert_id}")
         except Exception as e:
             raise StorageError(f"Failed to save price alert {alert.alert_id}: {e}")
     
+    def save_price_alerts(self, alerts: List[PriceAlert]) -> None:
+        """
+        Save several price alerts with a single write and sync.
+        
+        Args:
+            alerts: PriceAlert objects to save
+        """
+        try:
+            self._alerts.put_many_json([alert.model_dump_json().encode('utf-8') for alert in alerts])
+            logger.info(f"Saved {len(alerts)} price alerts")
+        except Exception as e:
+            raise StorageError(f"Failed to save {len(alerts)} price alerts: {e}")
+    
     def list_price_alerts(self, status: Optional[str] = None, 
                          product_name: Optional[str] = None,
                          limit: int = 20) -> List[Dict[str, Any]]:
@@ -272,26 +858,30 @@ class MarketDataCache:
             List of alert dictionaries
         """
         try:
-            alerts_data = self._read_json_file(self.price_alerts_file)
-            
-            alerts = []
-            for alert_id, alert_dict in alerts_data.items():
-                # Apply filters
-                if status and alert_dict.get("status") != status:
-                    continue
-                if product_name and alert_dict.get("product_name") != product_name:
-                    continue
-                
-                alerts.append(alert_dict)
-            
-            # Sort by creation date (newest first)
-            alerts.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+            matches = _alert_filter(status, product_name)
             
-            return alerts[:limit]
+            # The log keeps alerts ordered by creation date (newest first)
+            return [dict(alert_dict) for alert_dict in self._alerts.newest(limit, matches)]
         except Exception as e:
             logger.error(f"Failed to list price alerts: {e}")
             return []
     
+    def iter_price_alerts(self, status: Optional[str] = None,
+                          product_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over price alerts, newest first, reading the log only as far
+        as the caller consumes.
+        
+        Args:
+            status: Filter by alert status (active, triggered, expired, cancelled)
+            product_name: Filter by product name
+            
+        Yields:
+            Alert dictionaries
+        """
+        for alert_dict in self._alerts.iter_newest(_alert_filter(status, product_name)):
+            yield dict(alert_dict)
+    
     def cancel_price_alert(self, alert_id: str) -> bool:
         """
         Cancel a price alert by setting its status to cancelled.
@@ -303,15 +893,13 @@ class MarketDataCache:
             True if alert was cancelled, False if not found
         """
         try:
-            alerts_data = self._read_json_file(self.price_alerts_file)
-            
-            if alert_id not in alerts_data:
+            changes = {
+                "status": "cancelled",
+                "cancelled_at": datetime.now(timezone.utc).isoformat()
+            }
+            if not self._alerts.update(alert_id, changes):
                 return False
             
-            alerts_data[alert_id]["status"] = "cancelled"
-            alerts_data[alert_id]["cancelled_at"] = datetime.now(timezone.utc).isoformat()
-            
-            self._write_json_file(self.price_alerts_file, alerts_data)
             logger.info(f"Cancelled price alert: {alert_id}")
             return True
         except Exception as e:
@@ -325,17 +913,26 @@ class MarketDataCache:
             purchase: PurchaseRecord object to save
         """
         try:
-            records_data = self._read_json_file(self.purchase_records_file)
-            
-            # Convert Pydantic model to dict for JSON serialization
-            purchase_dict = purchase.model_dump()
-            records_data[purchase.purchase_id] = purchase_dict
-            
-            self._write_json_file(self.purchase_records_file, records_data)
+            # Serialized by pydantic directly; the index parses the same bytes
+            self._purchases.put_json(purchase.model_dump_json().encode('utf-8'))
             logger.info(f"Saved purchase record: {purchase.purchase_id}")
         except Exception as e:
             raise StorageError(f"Failed to save purchase record {purchase.purchase_id}: {e}")
     
+    def save_purchase_records(self, purchases: List[PurchaseRecord]) -> None:
+        """
+        Save several purchase records with a single write and sync.
+        
+        Args:
+            purchases: PurchaseRecord objects to save
+        """
+        try:
+            self._purchases.put_many_json([purchase.model_dump_json().encode('utf-8')
+                                           for purchase in purchases])
+            logger.info(f"Saved {len(purchases)} purchase records")
+        except Exception as e:
+            raise StorageError(f"Failed to save {len(purchases)} purchase records: {e}")
+    
     def get_purchase_history(self, product_name: str, 
                            limit: int = 50,
                            supplier: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -351,104 +948,115 @@ class MarketDataCache:
             List of purchase record dictionaries
         """
         try:
-            records_data = self._read_json_file(self.purchase_records_file)
-            
-            history = []
-            for purchase_id, purchase_dict in records_data.items():
-                # Filter by product name
-                if purchase_dict.get("product_name") != product_name:
-                    continue
-                
-                # Filter by supplier if specified
-                if supplier and purchase_dict.get("supplier") != supplier:
-                    continue
-                
-                history.append(purchase_dict)
-            
-            # Sort by purchase date (newest first)
-            history.sort(key=lambda x: x.get("purchase_date", ""), reverse=True)
+            matches = _purchase_filter(product_name, supplier)
             
-            return history[:limit]
+            # The log keeps purchases ordered by purchase date (newest first)
+            return [dict(purchase_dict) for purchase_dict in self._purchases.newest(limit, matches)]
         except Exception as e:
             logger.error(f"Failed to get purchase history for {product_name}: {e}")
             return []
+    
+    def iter_purchase_history(self, product_name: str,
+                              supplier: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over purchase records for a product, newest purchase first,
+        reading the log only as far as the caller consumes.
+        
+        Args:
+            product_name: Name of the product
+            supplier: Optional supplier filter
+            
+        Yields:
+            Purchase record dictionaries
+        """
+        for purchase_dict in self._purchases.iter_newest(_purchase_filter(product_name, supplier)):
+            yield dict(purchase_dict)
+
+
+# Buffered last_accessed updates are written back once this many have
+# accumulated or this long after the previous write-back
+_ACCESS_FLUSH_COUNT = 64
+_ACCESS_FLUSH_SECONDS = 30.0
+
+
+def _flush_access_times(sessions: _RecordLog, access_buf: Dict[str, str]) -> None:
+    """Write buffered last_accessed timestamps back to the session log"""
+    try:
+        while access_buf:
+            session_id, last_accessed = access_buf.popitem()
+            # Losing an access timestamp in a crash is harmless
+            sessions.update(session_id, {"last_accessed": last_accessed}, durable=False)
+    except Exception as e:
+        logger.warning(f"Failed to write back session access times: {e}")
 
 
 class SessionStorage:
     """
     Handles session-based storage for analysis results with individual product budgets.
     Each analysis session gets a unique ID and stores complete results.
+    
+    Session summaries live in a small index log so listing never touches the
+    analysis payloads, which are stored one file per session.
     """
     
     def __init__(self, cache_dir: str = "data"):
         self.cache_dir = Path(cache_dir)
-        self.analysis_results_file = self.cache_dir / "analysis_results.json"
+        self.sessions_file = self.cache_dir / "sessions.jsonl"
+        self.sessions_dir = self.cache_dir / "sessions"
         
         # Ensure cache directory exists
         self._ensure_cache_directory()
         
-        # Initialize analysis results file if it doesn't exist
-        self._initialize_analysis_file()
+        # The index is an append-only log, migrated from the whole-file
+        # analysis_results.json layout on first use
+        try:
+            self._sessions = _RecordLog(self.sessions_file, "session_id",
+                                        legacy_path=self.cache_dir / "analysis_results.json",
+                                        order_field="created_at")
+            self._split_inline_payloads()
+        except Exception as e:
+            raise StorageError(f"Failed to load analysis sessions: {e}")
+        
+        # Pending last_accessed updates, written back in batches and when the
+        # instance is collected; the finalizer must not hold a reference to self
+        self._access_buf: Dict[str, str] = {}
+        self._last_flush = time.monotonic()
+        weakref.finalize(self, _flush_access_times, self._sessions, self._access_buf)
     
     def _ensure_cache_directory(self) -> None:
         """Create cache directory if it doesn't exist"""
         try:
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.sessions_dir.mkdir(parents=True, exist_ok=True)
         except OSError as e:
             raise StorageError(f"Failed to create cache directory {self.cache_dir}: {e}")
     
-    def _initialize_analysis_file(self) -> None:
-        """Initialize analysis results file if it doesn't exist"""
-        try:
-            if not self.analysis_results_file.exists():
-                self._write_json_file(self.analysis_results_file, {})
-        except Exception as e:
-            raise StorageError(f"Failed to initialize analysis results file: {e}")
-    
-    @contextmanager
-    def _file_lock(self, file_path: Path):
-        """Simple file locking mechanism for concurrent access protection"""
-        lock_file = file_path.with_suffix(file_path.suffix + '.lock')
-        try:
-            lock_file.touch()
-            yield
-        finally:
-            if lock_file.exists():
-                lock_file.unlink()
-    
-    def _read_json_file(self, file_path: Path) -> Dict[str, Any]:
-        """Safely read JSON file with error handling"""
-        try:
-            with self._file_lock(file_path):
-                if not file_path.exists():
-                    return {}
-                
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if not content:
-                        return {}
-                    return json.loads(content)
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in {file_path}: {e}")
-            backup_path = file_path.with_suffix(f'.backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
-            file_path.rename(backup_path)
-            return {}
-        except Exception as e:
-            raise StorageError(f"Failed to read {file_path}: {e}")
+    def _payload_file(self, session_id: str) -> Path:
+        """Path of the analysis payload file for a session"""
+        if not session_id or Path(session_id).name != session_id:
+            raise StorageError(f"Invalid session ID: {session_id!r}")
+        return self.sessions_dir / f"{session_id}.json"
     
-    def _write_json_file(self, file_path: Path, data: Dict[str, Any]) -> None:
-        """Safely write JSON file with error handling"""
-        try:
-            with self._file_lock(file_path):
-                temp_file = file_path.with_suffix('.tmp')
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-                temp_file.replace(file_path)
-        except Exception as e:
-            temp_file = file_path.with_suffix('.tmp')
-            if temp_file.exists():
-                temp_file.unlink()
-            raise StorageError(f"Failed to write {file_path}: {e}")
+    def _split_inline_payloads(self) -> None:
+        """Move payloads of sessions migrated with their full record into their own files"""
+        split = False
+        for session_data in self._sessions.values():
+            if "analysis_response" not in session_data:
+                continue
+            split = True
+            response = session_data["analysis_response"]
+            payload = _dumps(response)
+            _atomic_write(self._payload_file(session_data["session_id"]), payload)
+            summary = {key: value for key, value in session_data.items()
+                       if key != "analysis_response"}
+            summary.update({
+                "product_count": len(response.get("product_analyses", [])),
+                "total_budget": response.get("overall_budget", {}).get("target", 0),
+                "size_bytes": len(payload)
+            })
+            self._sessions.put(summary)
+        if split:
+            # Drop the full records so later replays only read summaries
+            self._sessions.compact()
     
     def generate_session_id(self) -> str:
         """Generate a unique session ID"""
@@ -463,18 +1071,21 @@ class SessionStorage:
             analysis_response: Complete analysis response to store
         """
         try:
-            analysis_data = self._read_json_file(self.analysis_results_file)
+            # The payload file is written first so an indexed session always has one
+            payload = analysis_response.model_dump_json().encode('utf-8')
+            _atomic_write(self._payload_file(session_id), payload)
             
-            # Convert Pydantic model to dict for JSON serialization
-            session_data = {
+            now_ts = time.time()
+            now_iso = datetime.fromtimestamp(now_ts, timezone.utc).isoformat()
+            self._sessions.put({
                 "session_id": session_id,
-                "analysis_response": analysis_response.dict(),
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                "last_accessed": datetime.now(timezone.utc).isoformat()
-            }
-            
-            analysis_data[session_id] = session_data
-            self._write_json_file(self.analysis_results_file, analysis_data)
+                "created_at": now_iso,
+                "created_ts": now_ts,
+                "last_accessed": now_iso,
+                "product_count": len(analysis_response.product_analyses),
+                "total_budget": analysis_response.overall_budget.target,
+                "size_bytes": len(payload)
+            })
             
             logger.info(f"Saved analysis session: {session_id}")
         except Exception as e:
@@ -491,17 +1102,22 @@ class SessionStorage:
             Session data dictionary or None if not found
         """
         try:
-            analysis_data = self._read_json_file(self.analysis_results_file)
-            
-            if session_id not in analysis_data:
+            summary = self._sessions.get(session_id)
+            if summary is None:
                 return None
             
-            session_data = analysis_data[session_id]
+            with open(self._payload_file(session_id), 'rb') as f:
+                analysis_response = _loads(f.read())
+            
+            session_data = {
+                "session_id": session_id,
+                "analysis_response": analysis_response,
+                "created_at": summary.get("created_at"),
+                "created_ts": summary.get("created_ts"),
+                "last_accessed": datetime.now(timezone.utc).isoformat()
+            }
             
-            # Update last accessed timestamp
-            session_data["last_accessed"] = datetime.now(timezone.utc).isoformat()
-            analysis_data[session_id] = session_data
-            self._write_json_file(self.analysis_results_file, analysis_data)
+            self._record_access(session_id, session_data["last_accessed"])
             
             logger.info(f"Retrieved analysis session: {session_id}")
             return session_data
@@ -509,6 +1125,43 @@ class SessionStorage:
             logger.error(f"Failed to retrieve analysis session {session_id}: {e}")
             return None
     
+    def get_analysis_session_json(self, session_id: str) -> Optional[bytes]:
+        """
+        Retrieve the stored analysis response of a session as raw JSON.
+        
+        Args:
+            session_id: Session identifier to retrieve
+            
+        Returns:
+            JSON bytes for AnalyzeResponse.model_validate_json(), or None if not found
+        """
+        try:
+            if self._sessions.get(session_id) is None:
+                return None
+            
+            with open(self._payload_file(session_id), 'rb') as f:
+                payload = f.read()
+            
+            self._record_access(session_id, datetime.now(timezone.utc).isoformat())
+            
+            logger.info(f"Retrieved analysis session: {session_id}")
+            return payload
+        except Exception as e:
+            logger.error(f"Failed to retrieve analysis session {session_id}: {e}")
+            return None
+    
+    def _record_access(self, session_id: str, accessed_at: str) -> None:
+        # Update last accessed timestamp without rewriting the session
+        self._access_buf[session_id] = accessed_at
+        if (len(self._access_buf) >= _ACCESS_FLUSH_COUNT
+                or time.monotonic() - self._last_flush > _ACCESS_FLUSH_SECONDS):
+            self.flush_access_times()
+    
+    def flush_access_times(self) -> None:
+        """Write buffered last_accessed timestamps to storage"""
+        _flush_access_times(self._sessions, self._access_buf)
+        self._last_flush = time.monotonic()
+    
     def list_sessions(self, limit: int = 50) -> List[Dict[str, Any]]:
         """
         List recent analysis sessions.
@@ -520,27 +1173,48 @@ class SessionStorage:
             List of session summaries sorted by creation date (newest first)
         """
         try:
-            analysis_data = self._read_json_file(self.analysis_results_file)
-            
-            sessions = []
-            for session_id, session_data in analysis_data.items():
-                summary = {
-                    "session_id": session_id,
+            # The index keeps sessions ordered by creation date (newest first)
+            return [
+                {
+                    "session_id": session_data["session_id"],
                     "created_at": session_data.get("created_at"),
-                    "last_accessed": session_data.get("last_accessed"),
-                    "product_count": len(session_data.get("analysis_response", {}).get("product_analyses", [])),
-                    "total_budget": session_data.get("analysis_response", {}).get("overall_budget", {}).get("target", 0)
+                    "last_accessed": self._access_buf.get(session_data["session_id"],
+                                                          session_data.get("last_accessed")),
+                    "product_count": session_data.get("product_count", 0),
+                    "total_budget": session_data.get("total_budget", 0)
                 }
-                sessions.append(summary)
-            
-            # Sort by creation date (newest first)
-            sessions.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-            
-            return sessions[:limit]
+                for session_data in self._sessions.newest(limit)
+            ]
         except Exception as e:
             logger.error(f"Failed to list sessions: {e}")
             return []
     
+    def count_sessions(self) -> int:
+        """Number of stored analysis sessions"""
+        try:
+            return len(self._sessions)
+        except Exception as e:
+            logger.error(f"Failed to count sessions: {e}")
+            return 0
+    
+    def get_recent_budget_targets(self, limit: int = 10) -> List[float]:
+        """
+        Overall budget targets of the most recent sessions, newest first.
+        
+        Read from the session index, so no analysis payload is loaded.
+        """
+        try:
+            return [session_data.get("total_budget", 0) for session_data in self._sessions.newest(limit)]
+        except Exception as e:
+            logger.error(f"Failed to read recent budget targets: {e}")
+            return []
+    
+    def _remove_payload(self, session_id: str) -> None:
+        try:
+            self._payload_file(session_id).unlink()
+        except FileNotFoundError:
+            pass
+    
     def delete_session(self, session_id: str) -> bool:
         """
         Delete a specific analysis session.
@@ -552,13 +1226,10 @@ class SessionStorage:
             True if session was deleted, False if not found
         """
         try:
-            analysis_data = self._read_json_file(self.analysis_results_file)
-            
-            if session_id not in analysis_data:
+            self._access_buf.pop(session_id, None)
+            if not self._sessions.delete(session_id):
                 return False
-            
-            del analysis_data[session_id]
-            self._write_json_file(self.analysis_results_file, analysis_data)
+            self._remove_payload(session_id)
             
             logger.info(f"Deleted analysis session: {session_id}")
             return True
@@ -576,29 +1247,21 @@ class SessionStorage:
             Number of sessions removed
         """
         try:
-            analysis_data = self._read_json_file(self.analysis_results_file)
-            current_time = datetime.now(timezone.utc)
-            removed_count = 0
+            cutoff = time.time() - max_age_days * 24 * 3600
             
-            sessions_to_remove = []
-            for session_id, session_data in analysis_data.items():
-                try:
-                    created_at = datetime.fromisoformat(session_data["created_at"])
-                    age_seconds = (current_time - created_at).total_seconds()
-                    age_days = age_seconds / (24 * 3600)  # Convert to days with fractional precision
-                    
-                    if age_days > max_age_days:
-                        sessions_to_remove.append(session_id)
-                except (KeyError, ValueError):
-                    # Remove sessions with invalid timestamps
-                    sessions_to_remove.append(session_id)
-            
-            for session_id in sessions_to_remove:
-                del analysis_data[session_id]
-                removed_count += 1
+            def is_current(session_data: Dict[str, Any]) -> bool:
+                # Sessions with missing or invalid timestamps are removed too
+                created_at = _entry_timestamp(session_data, "created_ts", "created_at")
+                return created_at is not None and created_at >= cutoff
             
+            sessions_to_remove = self._sessions.retain(is_current)
+            removed_count = len(sessions_to_remove)
             if removed_count > 0:
-                self._write_json_file(self.analysis_results_file, analysis_data)
+                # Payload files go without a sync each; the compacted index
+                # no longer references them
+                for session_id in sessions_to_remove:
+                    self._access_buf.pop(session_id, None)
+                    self._remove_payload(session_id)
                 logger.info(f"Removed {removed_count} old analysis sessions")
             
             return removed_count
@@ -607,10 +1270,20 @@ class SessionStorage:
 
 
 # Convenience functions for easy access
-def get_market_cache() -> MarketDataCache:
-    """Get a MarketDataCache instance"""
+def _use_sqlite() -> bool:
+    """Whether STORAGE_BACKEND selects the SQLite backend instead of JSON files"""
+    return os.getenv("STORAGE_BACKEND", "json").strip().lower() == "sqlite"
+
+def get_market_cache() -> Union[MarketDataCache, "SQLiteMarketDataCache"]:
+    """Get a MarketDataCache instance for the configured storage backend"""
+    if _use_sqlite():
+        from .sqlite_storage import SQLiteMarketDataCache
+        return SQLiteMarketDataCache()
     return MarketDataCache()
 
-def get_session_storage() -> SessionStorage:
-    """Get a SessionStorage instance"""
+def get_session_storage() -> Union[SessionStorage, "SQLiteSessionStorage"]:
+    """Get a SessionStorage instance for the configured storage backend"""
+    if _use_sqlite():
+        from .sqlite_storage import SQLiteSessionStorage
+        return SQLiteSessionStorage()
     return SessionStorage()
\ No newline at end of file
@@ -3,9 +3,12 @@ Utility functions for integrating the storage system with the application.
 Provides convenient methods for common storage operations.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from collections import OrderedDict
 from datetime import datetime, timezone
+from functools import lru_cache
 import logging
+import threading
 
 from .storage import MarketDataCache, SessionStorage, get_market_cache, get_session_storage
 from .models import (
@@ -16,6 +19,15 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+# Number of (product, location) supplier lists kept by each StorageManager
+_HOT_PRICES_MAX = 256
+
+
+def _location_key(farm_location: FarmLocation) -> str:
+    """Market cache key for a farm location"""
+    return f"{farm_location.city}, {farm_location.state}, {farm_location.country}"
+
+
 class StorageManager:
     """
     High-level storage manager that provides convenient methods for 
@@ -25,6 +37,11 @@ class StorageManager:
     def __init__(self):
         self.market_cache = get_market_cache()
         self.session_storage = get_session_storage()
+        # Supplier lists already built from market cache entries, least recently
+        # used first; each is tagged with the entry's last update so a newer
+        # write from any process makes it a miss
+        self._hot_prices: "OrderedDict[Tuple[str, str], Tuple[Any, List[SupplierRecommendation]]]" = OrderedDict()
+        self._hot_lock = threading.Lock()
     
     # Market Data Operations
     
@@ -43,12 +60,12 @@ class StorageManager:
             sentiment_data: Optional market sentiment data
         """
         try:
-            location_str = f"{farm_location.city}, {farm_location.state}, {farm_location.country}"
+            location_str = _location_key(farm_location)
             
             # Convert supplier recommendations to price quotes format
-            price_quotes = []
-            for supplier in suppliers:
-                quote = {
+            cached_at = datetime.now(timezone.utc).isoformat()
+            price_quotes = [
+                {
                     "supplier": supplier.name,
                     "price": supplier.price,
                     "unit": "unit",  # Default unit, should be passed from product
@@ -58,14 +75,17 @@ class StorageManager:
                     "lead_time": supplier.lead_time,
                     "reliability_score": supplier.reliability,
                     "contact_info": supplier.contact_info,
-                    "cached_at": datetime.now(timezone.utc).isoformat()
+                    "cached_at": cached_at
                 }
-                price_quotes.append(quote)
+                for supplier in suppliers
+            ]
             
             self.market_cache.cache_market_data(
                 product_name, location_str, price_quotes, 
                 forecast_data, sentiment_data
             )
+            with self._hot_lock:
+                self._hot_prices.pop((product_name, location_str), None)
             
             logger.info(f"Cached price data for {product_name} with {len(suppliers)} suppliers")
         except Exception as e:
@@ -85,7 +105,7 @@ class StorageManager:
             List of supplier recommendations or None if not cached/expired
         """
         try:
-            location_str = f"{farm_location.city}, {farm_location.state}, {farm_location.country}"
+            location_str = _location_key(farm_location)
             
             cached_data = self.market_cache.get_cached_market_data(
                 product_name, location_str, max_age_hours
@@ -94,20 +114,38 @@ class StorageManager:
             if not cached_data:
                 return None
             
-            # Convert price quotes back to supplier recommendations
-            suppliers = []
-            for quote in cached_data.get("price_quotes", []):
-                supplier = SupplierRecommendation(
-                    name=quote.get("supplier", "Unknown"),
-                    price=quote.get("price", 0.0),
-                    delivery_terms=quote.get("delivery_terms"),
-                    lead_time=quote.get("lead_time"),
-                    reliability=quote.get("reliability_score"),
-                    moq=quote.get("moq"),
-                    contact_info=quote.get("contact_info"),
-                    location=quote.get("location")
-                )
-                suppliers.append(supplier)
+            key = (product_name, location_str)
+            version = cached_data.get("last_updated_ts", cached_data.get("last_updated"))
+            with self._hot_lock:
+                hot = self._hot_prices.get(key)
+                if hot is not None and hot[0] == version:
+                    self._hot_prices.move_to_end(key)
+            
+            if hot is not None and hot[0] == version:
+                built = hot[1]
+            else:
+                # Convert price quotes back to supplier recommendations
+                built = [
+                    SupplierRecommendation(
+                        name=quote.get("supplier", "Unknown"),
+                        price=quote.get("price", 0.0),
+                        delivery_terms=quote.get("delivery_terms"),
+                        lead_time=quote.get("lead_time"),
+                        reliability=quote.get("reliability_score"),
+                        moq=quote.get("moq"),
+                        contact_info=quote.get("contact_info"),
+                        location=quote.get("location")
+                    )
+                    for quote in cached_data.get("price_quotes", [])
+                ]
+                with self._hot_lock:
+                    self._hot_prices[key] = (version, built)
+                    self._hot_prices.move_to_end(key)
+                    if len(self._hot_prices) > _HOT_PRICES_MAX:
+                        self._hot_prices.popitem(last=False)
+            
+            # Copies, so callers can modify them without touching the cached list
+            suppliers = [supplier.model_copy() for supplier in built]
             
             logger.info(f"Retrieved {len(suppliers)} cached suppliers for {product_name}")
             return suppliers
@@ -148,14 +186,13 @@ class StorageManager:
             Analysis response or None if not found
         """
         try:
-            session_data = self.session_storage.get_analysis_session(session_id)
+            raw = self.session_storage.get_analysis_session_json(session_id)
             
-            if not session_data:
+            if not raw:
                 return None
             
-            # Convert dict back to Pydantic model
-            response_data = session_data["analysis_response"]
-            analysis_response = AnalyzeResponse(**response_data)
+            # Parse straight into the Pydantic model, without an intermediate dict
+            analysis_response = AnalyzeResponse.model_validate_json(raw)
             
             logger.info(f"Retrieved analysis result for session: {session_id}")
             return analysis_response
@@ -219,26 +256,16 @@ class StorageManager:
             Dictionary with storage statistics
         """
         try:
-            # Get session count
-            sessions = self.session_storage.list_sessions(limit=1000)  # Get all sessions
-            session_count = len(sessions)
+            session_count = self.session_storage.count_sessions()
             
-            # Calculate total budget from recent sessions
-            total_budgets = []
-            for session in sessions[:10]:  # Check last 10 sessions
-                try:
-                    session_data = self.session_storage.get_analysis_session(session["session_id"])
-                    if session_data:
-                        budget = session_data["analysis_response"]["overall_budget"]["target"]
-                        total_budgets.append(budget)
-                except:
-                    continue
+            # Average budget over the last 10 sessions, read from the session index
+            total_budgets = self.session_storage.get_recent_budget_targets(10)
             
             avg_budget = sum(total_budgets) / len(total_budgets) if total_budgets else 0
             
             stats = {
                 "total_sessions": session_count,
-                "recent_sessions": len(sessions[:10]),
+                "recent_sessions": len(total_budgets),
                 "average_budget": avg_budget,
                 "stats_generated_at": datetime.now(timezone.utc).isoformat()
             }
@@ -265,6 +292,20 @@ class StorageManager:
             logger.error(f"Failed to save price alert: {e}")
             raise
     
+    def save_price_alerts(self, alerts: List[PriceAlert]) -> None:
+        """
+        Save several price alerts in one batch.
+        
+        Args:
+            alerts: PriceAlert objects to save
+        """
+        try:
+            self.market_cache.save_price_alerts(alerts)
+            logger.info(f"Saved {len(alerts)} price alerts")
+        except Exception as e:
+            logger.error(f"Failed to save price alerts: {e}")
+            raise
+    
     def list_price_alerts(self, status: Optional[str] = None, 
                          product_name: Optional[str] = None,
                          limit: int = 20) -> List[Dict[str, Any]]:
@@ -322,6 +363,20 @@ class StorageManager:
             logger.error(f"Failed to save purchase record: {e}")
             raise
     
+    def save_purchase_records(self, purchases: List[PurchaseRecord]) -> None:
+        """
+        Save several purchase records in one batch.
+        
+        Args:
+            purchases: PurchaseRecord objects to save
+        """
+        try:
+            self.market_cache.save_purchase_records(purchases)
+            logger.info(f"Saved {len(purchases)} purchase records")
+        except Exception as e:
+            logger.error(f"Failed to save purchase records: {e}")
+            raise
+    
     def get_purchase_history(self, product_name: str, 
                            limit: int = 50,
                            supplier: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -346,6 +401,7 @@ class StorageManager:
 
 
 # Convenience function for easy access
+@lru_cache()
 def get_storage_manager() -> StorageManager:
-    """Get a StorageManager instance"""
+    """Get the shared StorageManager instance"""
     return StorageManager()
\ No newline at end of file
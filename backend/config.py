@@ -7,7 +7,14 @@ import os
 from typing import List, Optional
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
-from functools import lru_cache
+from functools import cached_property, lru_cache
+
+# Accepted values, in the order error messages list them
+_LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+_ENVIRONMENTS = ("development", "staging", "production")
+
+# Directories already created by this process
+_created_dirs = set()
 
 class Settings(BaseSettings):
     """Application settings with environment variable support."""
@@ -88,19 +95,19 @@ class Settings(BaseSettings):
     @classmethod
     def validate_log_level(cls, v):
         """Validate log level."""
-        valid_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
-        if v.upper() not in valid_levels:
-            raise ValueError(f"Log level must be one of: {valid_levels}")
-        return v.upper()
+        level = v.upper()
+        if level not in _LOG_LEVELS:
+            raise ValueError(f"Log level must be one of: {list(_LOG_LEVELS)}")
+        return level
     
     @field_validator("environment")
     @classmethod
     def validate_environment(cls, v):
         """Validate environment."""
-        valid_environments = ["development", "staging", "production"]
-        if v.lower() not in valid_environments:
-            raise ValueError(f"Environment must be one of: {valid_environments}")
-        return v.lower()
+        environment = v.lower()
+        if environment not in _ENVIRONMENTS:
+            raise ValueError(f"Environment must be one of: {list(_ENVIRONMENTS)}")
+        return environment
     
     def create_directories(self):
         """Create necessary directories."""
@@ -113,7 +120,9 @@ class Settings(BaseSettings):
                 directories.append(log_dir)
         
         for directory in directories:
-            os.makedirs(directory, exist_ok=True)
+            if directory not in _created_dirs:
+                os.makedirs(directory, exist_ok=True)
+                _created_dirs.add(directory)
     
     def is_production(self) -> bool:
         """Check if running in production environment."""
@@ -123,8 +132,14 @@ class Settings(BaseSettings):
         """Check if running in development environment."""
         return self.environment == "development"
     
-    def get_aws_config(self) -> dict:
-        """Get AWS configuration dictionary."""
+    @cached_property
+    def cors_origins_set(self) -> frozenset:
+        """CORS origins as a set, for constant-time membership checks."""
+        return frozenset(self.cors_origins)
+    
+    @cached_property
+    def aws_config(self) -> dict:
+        """AWS configuration dictionary, built once per settings instance."""
         config = {
             "region_name": self.aws_region
         }
@@ -140,6 +155,11 @@ class Settings(BaseSettings):
         
         return config
     
+    def get_aws_config(self) -> dict:
+        """Get AWS configuration dictionary."""
+        # Copied so callers can adjust it without touching the cached one
+        return dict(self.aws_config)
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -8,49 +8,110 @@ import os
 import sys
 import subprocess
 import argparse
+import base64
+import grp
 import json
+import mmap
+import pwd
+import re
 import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 
+_print_lock = threading.Lock()
+_DEFAULT_VALUE_PATTERN = re.compile(rb"your_|change_me", re.IGNORECASE)
+
+
+def _print(*args, **kwargs):
+    """Print under a lock so status lines from concurrent setup tasks don't interleave."""
+    with _print_lock:
+        print(*args, **kwargs)
+
+
+def _sudo_ready() -> bool:
+    """Whether sudo can run without prompting, authenticating once up front if needed."""
+    if os.geteuid() == 0:
+        return True
+    try:
+        if subprocess.run(["sudo", "-n", "true"], capture_output=True).returncode == 0:
+            return True
+        return subprocess.run(["sudo", "-v"]).returncode == 0
+    except FileNotFoundError:
+        return False
+
+
 class ProductionSetup:
     """Handles production-specific setup tasks."""
     
     def __init__(self):
         self.project_root = Path(__file__).parent
+        self._user_exists: Optional[bool] = None
+        self._ufw_status: Optional[str] = None
+    
+    def _user_exists_cached(self) -> bool:
+        """Return whether the service user exists, querying `id` only once."""
+        if self._user_exists is None:
+            result = subprocess.run(["id", "farmer-budget"], capture_output=True)
+            self._user_exists = result.returncode == 0
+        return self._user_exists
+    
+    def _ufw_status_cached(self) -> str:
+        """Return `ufw status` output, querying UFW only once."""
+        if self._ufw_status is None:
+            result = subprocess.run(["sudo", "ufw", "status"], capture_output=True, text=True)
+            self._ufw_status = result.stdout
+        return self._ufw_status
+    
+    def _run(self, cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+        """
+        Run a command, raising CalledProcessError on failure. Its output is
+        captured and replayed through _print in one piece, so children of
+        concurrent setup tasks don't interleave on the terminal.
+        """
+        kwargs.setdefault("stdout", subprocess.PIPE)
+        result = subprocess.run(cmd, stderr=subprocess.PIPE, text=True, **kwargs)
+        output = "".join(stream for stream in (result.stdout, result.stderr) if stream).rstrip()
+        if output:
+            _print(output)
+        result.check_returncode()
+        return result
+    
+    def invalidate(self):
+        """Forget cached user and firewall state so the next check re-queries."""
+        self._user_exists = None
+        self._ufw_status = None
         
     def generate_secrets(self) -> Dict[str, str]:
         """Generate secure secrets for production."""
-        print("Generating secure secrets...")
-        
-        secrets_dict = {
-            "SECRET_KEY": secrets.token_urlsafe(32),
-            "API_SECRET": secrets.token_urlsafe(24),
-            "SESSION_SECRET": secrets.token_urlsafe(32),
-            "ENCRYPTION_KEY": secrets.token_urlsafe(32)
-        }
-        
-        print("✓ Generated secure secrets")
+        _print("Generating secure secrets...")
+        
+        # Same lengths as token_urlsafe(32/24/32/32), drawn and encoded in one pass
+        widths = {"SECRET_KEY": 43, "API_SECRET": 32, "SESSION_SECRET": 43, "ENCRYPTION_KEY": 43}
+        encoded = base64.urlsafe_b64encode(secrets.token_bytes(123)).decode("ascii")
+        secrets_dict = {}
+        offset = 0
+        for name, width in widths.items():
+            secrets_dict[name] = encoded[offset:offset + width]
+            offset += width
+        
+        _print("✓ Generated secure secrets")
         return secrets_dict
     
     def setup_ssl_certificates(self, domain: str, email: str):
         """Set up SSL certificates using Let's Encrypt."""
-        print(f"Setting up SSL certificates for {domain}...")
+        _print(f"Setting up SSL certificates for {domain}...")
         
         try:
-            # Install certbot if not present
-            subprocess.run(["which", "certbot"], check=True, capture_output=True)
-        except subprocess.CalledProcessError:
-            print("Installing certbot...")
+            # Install certbot if not present (probe and install in one shell)
             subprocess.run([
-                "sudo", "apt-get", "update"
+                "sudo", "sh", "-c",
+                "command -v certbot >/dev/null || { apt-get update && "
+                "DEBIAN_FRONTEND=noninteractive apt-get install -y certbot python3-certbot-nginx; }"
             ], check=True)
-            subprocess.run([
-                "sudo", "apt-get", "install", "-y", "certbot", "python3-certbot-nginx"
-            ], check=True)
-        
-        # Obtain certificate
-        try:
+            
+            # Obtain certificate
             subprocess.run([
                 "sudo", "certbot", "--nginx",
                 "-d", domain,
@@ -58,75 +119,86 @@ class ProductionSetup:
                 "--agree-tos",
                 "--non-interactive"
             ], check=True)
-            print(f"✓ SSL certificate obtained for {domain}")
+            _print(f"✓ SSL certificate obtained for {domain}")
             
             # Set up auto-renewal
             subprocess.run([
                 "sudo", "systemctl", "enable", "certbot.timer"
             ], check=True)
-            print("✓ SSL certificate auto-renewal enabled")
+            _print("✓ SSL certificate auto-renewal enabled")
             
         except subprocess.CalledProcessError as e:
-            print(f"✗ SSL certificate setup failed: {e}")
+            _print(f"✗ SSL certificate setup failed: {e}")
             return False
         
         return True
     
+    def setup_aws_credentials(self, method: str):
+        """Configure AWS credentials in-process, without prompting."""
+        # Imported here so the helper (and its sys.path lookup) is only paid for when used
+        from setup_aws_credentials import setup_aws_credentials
+        
+        setup_aws_credentials(method, interactive=False)
+        return True
+    
     def setup_firewall(self):
         """Configure UFW firewall for production."""
-        print("Configuring firewall...")
+        _print("Configuring firewall...")
+        
+        # Enable UFW, set default policies and open SSH, HTTP/HTTPS and the
+        # application port (only from localhost) in one shell
+        script = (
+            "set -e\n"
+            "ufw --force enable\n"
+            "ufw default deny incoming\n"
+            "ufw default allow outgoing\n"
+            "ufw allow ssh\n"
+            "ufw allow 80\n"
+            "ufw allow 443\n"
+            "ufw allow from 127.0.0.1 to any port 8000\n"
+            "ufw status\n"
+        )
         
         try:
-            # Enable UFW
-            subprocess.run(["sudo", "ufw", "--force", "enable"], check=True)
+            result = subprocess.run(
+                ["sudo", "sh", "-c", script],
+                check=True, capture_output=True, text=True
+            )
             
-            # Default policies
-            subprocess.run(["sudo", "ufw", "default", "deny", "incoming"], check=True)
-            subprocess.run(["sudo", "ufw", "default", "allow", "outgoing"], check=True)
-            
-            # Allow SSH
-            subprocess.run(["sudo", "ufw", "allow", "ssh"], check=True)
-            
-            # Allow HTTP and HTTPS
-            subprocess.run(["sudo", "ufw", "allow", "80"], check=True)
-            subprocess.run(["sudo", "ufw", "allow", "443"], check=True)
-            
-            # Allow application port (only from localhost)
-            subprocess.run(["sudo", "ufw", "allow", "from", "127.0.0.1", "to", "any", "port", "8000"], check=True)
-            
-            print("✓ Firewall configured")
+            _print("✓ Firewall configured")
             
             # Show status
-            result = subprocess.run(["sudo", "ufw", "status"], capture_output=True, text=True)
-            print("Firewall status:")
-            print(result.stdout)
+            status_start = result.stdout.rfind("Status:")
+            self._ufw_status = result.stdout[status_start:] if status_start != -1 else result.stdout
+            _print("Firewall status:")
+            _print(self._ufw_status)
             
         except subprocess.CalledProcessError as e:
-            print(f"✗ Firewall setup failed: {e}")
+            _print(f"✗ Firewall setup failed: {e}")
             return False
         
         return True
     
     def setup_system_user(self):
         """Create dedicated system user for the application."""
-        print("Setting up system user...")
+        _print("Setting up system user...")
         
         try:
             # Check if user exists
-            result = subprocess.run(["id", "farmer-budget"], capture_output=True)
-            if result.returncode == 0:
-                print("✓ User 'farmer-budget' already exists")
+            if self._user_exists_cached():
+                _print("✓ User 'farmer-budget' already exists")
                 return True
             
             # Create system user
-            subprocess.run([
+            self._run([
                 "sudo", "useradd",
                 "--system",
                 "--shell", "/bin/false",
                 "--home", "/var/lib/farmer-budget",
                 "--create-home",
                 "farmer-budget"
-            ], check=True)
+            ])
+            self.invalidate()
             
             # Create application directories
             app_dirs = [
@@ -137,45 +209,59 @@ class ProductionSetup:
                 "/var/lib/farmer-budget/backups"
             ]
             
-            for directory in app_dirs:
-                subprocess.run(["sudo", "mkdir", "-p", directory], check=True)
-                subprocess.run(["sudo", "chown", "farmer-budget:farmer-budget", directory], check=True)
+            self._run([
+                "sudo", "install", "-d",
+                "-o", "farmer-budget", "-g", "farmer-budget",
+                *app_dirs
+            ])
             
-            print("✓ System user 'farmer-budget' created")
+            _print("✓ System user 'farmer-budget' created")
             
         except subprocess.CalledProcessError as e:
-            print(f"✗ System user setup failed: {e}")
+            _print(f"✗ System user setup failed: {e}")
             return False
         
         return True
     
     def setup_database_security(self):
         """Set up database security (for future database integration)."""
-        print("Setting up database security...")
+        _print("Setting up database security...")
         
         # For now, just secure file permissions for JSON storage
+        storage_dirs = [
+            path for path in (self.project_root / "data", self.project_root / "cache")
+            if path.exists()
+        ]
+        
         try:
-            data_dir = self.project_root / "data"
-            if data_dir.exists():
-                subprocess.run(["sudo", "chmod", "750", str(data_dir)], check=True)
-                subprocess.run(["sudo", "chown", "-R", "farmer-budget:farmer-budget", str(data_dir)], check=True)
+            if os.geteuid() == 0:
+                # Running as root: set permissions in-process, no sudo children
+                uid = pwd.getpwnam("farmer-budget").pw_uid
+                gid = grp.getgrnam("farmer-budget").gr_gid
+                for path in storage_dirs:
+                    os.chmod(path, 0o750)
+                    os.chown(path, uid, gid)
+                    for root, dirs, files in os.walk(path):
+                        for name in dirs + files:
+                            os.chown(os.path.join(root, name), uid, gid, follow_symlinks=False)
+            elif storage_dirs:
+                self._run([
+                    "sudo", "sh", "-c",
+                    'chmod 750 "$@" && chown -R farmer-budget:farmer-budget "$@"',
+                    "sh", *map(str, storage_dirs)
+                ])
             
-            cache_dir = self.project_root / "cache"
-            if cache_dir.exists():
-                subprocess.run(["sudo", "chmod", "750", str(cache_dir)], check=True)
-                subprocess.run(["sudo", "chown", "-R", "farmer-budget:farmer-budget", str(cache_dir)], check=True)
+            _print("✓ File storage security configured")
             
-            print("✓ File storage security configured")
-            
-        except subprocess.CalledProcessError as e:
-            print(f"✗ Database security setup failed: {e}")
+        except (KeyError, OSError, subprocess.CalledProcessError) as e:
+            _print(f"✗ Database security setup failed: {e}")
             return False
         
         return True
     
     def setup_log_monitoring(self):
         """Set up log monitoring and alerting."""
-        print("Setting up log monitoring...")
+        _print("Setting up log monitoring...")
         
         # Create rsyslog configuration for application logs
         rsyslog_config = """# Farmer Budget Optimizer logging
@@ -184,84 +270,140 @@ if $programname == 'farmer-budget-optimizer' then /var/log/farmer-budget-optimiz
 """
         
         try:
-            with open("/tmp/farmer-budget-rsyslog.conf", "w") as f:
-                f.write(rsyslog_config)
-            
-            subprocess.run([
-                "sudo", "mv", "/tmp/farmer-budget-rsyslog.conf",
-                "/etc/rsyslog.d/50-farmer-budget-optimizer.conf"
-            ], check=True)
-            
-            # Create log directory
-            subprocess.run(["sudo", "mkdir", "-p", "/var/log/farmer-budget-optimizer"], check=True)
-            subprocess.run(["sudo", "chown", "syslog:adm", "/var/log/farmer-budget-optimizer"], check=True)
+            self._run(
+                ["sudo", "tee", "/etc/rsyslog.d/50-farmer-budget-optimizer.conf"],
+                input=rsyslog_config, stdout=subprocess.DEVNULL
+            )
             
-            # Restart rsyslog
-            subprocess.run(["sudo", "systemctl", "restart", "rsyslog"], check=True)
+            # Create log directory and restart rsyslog
+            self._run([
+                "sudo", "sh", "-c",
+                "mkdir -p /var/log/farmer-budget-optimizer && "
+                "chown syslog:adm /var/log/farmer-budget-optimizer && "
+                "systemctl restart rsyslog"
+            ])
             
-            print("✓ Log monitoring configured")
+            _print("✓ Log monitoring configured")
             
         except subprocess.CalledProcessError as e:
-            print(f"✗ Log monitoring setup failed: {e}")
+            _print(f"✗ Log monitoring setup failed: {e}")
             return False
         
         return True
     
     def setup_performance_monitoring(self):
         """Set up basic performance monitoring."""
-        print("Setting up performance monitoring...")
+        _print("Setting up performance monitoring...")
         
         # Create performance monitoring script
-        monitor_script = """#!/bin/bash
+        monitor_script = """#!/usr/bin/env python3
 # Performance monitoring script for Farmer Budget Optimizer
+# Reads /proc and statvfs directly so a run spawns only systemctl.
+
+import http.client
+import os
+import subprocess
+import time
+
+LOG_FILE = "/var/log/farmer-budget-optimizer/performance.log"
+LOG_DIR = "/var/log/farmer-budget-optimizer"
+SERVICE_NAME = "farmer-budget-optimizer-production"
+
+
+def cpu_times():
+    with open("/proc/stat") as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0)
+    return idle, sum(values)
+
 
-LOG_FILE="/var/log/farmer-budget-optimizer/performance.log"
-SERVICE_NAME="farmer-budget-optimizer-production"
+def cpu_usage():
+    idle1, total1 = cpu_times()
+    time.sleep(0.1)
+    idle2, total2 = cpu_times()
+    total = total2 - total1
+    return 100.0 * (total - (idle2 - idle1)) / total if total else 0.0
 
-# Function to log with timestamp
-log_metric() {
-    echo "$(date '+%Y-%m-%d %H:%M:%S') - $1" >> "$LOG_FILE"
-}
 
-# CPU usage
-CPU_USAGE=$(top -bn1 | grep "Cpu(s)" | awk '{print $2}' | awk -F'%' '{print $1}')
-log_metric "CPU_USAGE: ${CPU_USAGE}%"
+def memory_usage():
+    meminfo = {}
+    with open("/proc/meminfo") as f:
+        for line in f:
+            key, value = line.split(":", 1)
+            meminfo[key] = int(value.split()[0])
+    total = meminfo["MemTotal"]
+    available = meminfo.get("MemAvailable", meminfo["MemFree"])
+    return 100.0 * (total - available) / total
 
-# Memory usage
-MEMORY_USAGE=$(free | grep Mem | awk '{printf("%.2f", ($3/$2) * 100.0)}')
-log_metric "MEMORY_USAGE: ${MEMORY_USAGE}%"
 
-# Disk usage
-DISK_USAGE=$(df -h / | awk 'NR==2 {print $5}' | sed 's/%//')
-log_metric "DISK_USAGE: ${DISK_USAGE}%"
+def disk_usage():
+    st = os.statvfs("/")
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    usable = used + st.f_bavail * st.f_frsize
+    return 100.0 * used / usable if usable else 0.0
 
-# Service status
-if systemctl is-active --quiet "$SERVICE_NAME"; then
-    log_metric "SERVICE_STATUS: RUNNING"
-else
-    log_metric "SERVICE_STATUS: STOPPED"
-fi
 
-# Application response time
-RESPONSE_TIME=$(curl -o /dev/null -s -w '%{time_total}' http://127.0.0.1:8000/api/health 2>/dev/null || echo "ERROR")
-log_metric "RESPONSE_TIME: ${RESPONSE_TIME}s"
+def response_time():
+    conn = http.client.HTTPConnection("127.0.0.1", 8000, timeout=10)
+    try:
+        start = time.perf_counter()
+        conn.request("GET", "/api/health")
+        conn.getresponse().read()
+        return f"{time.perf_counter() - start:.3f}"
+    except OSError:
+        return "ERROR"
+    finally:
+        conn.close()
 
-# Log file size
-LOG_SIZE=$(du -sh /var/log/farmer-budget-optimizer/ 2>/dev/null | awk '{print $1}' || echo "0")
-log_metric "LOG_SIZE: ${LOG_SIZE}"
+
+def log_size():
+    total = 0
+    for root, _dirs, files in os.walk(LOG_DIR):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    for unit in ("B", "K", "M", "G"):
+        if total < 1024 or unit == "G":
+            return f"{total:.1f}{unit}" if unit != "B" else f"{total}{unit}"
+        total /= 1024
+
+
+def service_status():
+    result = subprocess.run(["systemctl", "is-active", "--quiet", SERVICE_NAME])
+    return "RUNNING" if result.returncode == 0 else "STOPPED"
+
+
+def main():
+    metrics = [
+        f"CPU_USAGE: {cpu_usage():.1f}%",
+        f"MEMORY_USAGE: {memory_usage():.2f}%",
+        f"DISK_USAGE: {disk_usage():.0f}%",
+        f"SERVICE_STATUS: {service_status()}",
+        f"RESPONSE_TIME: {response_time()}s",
+        f"LOG_SIZE: {log_size()}",
+    ]
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    with open(LOG_FILE, "a") as f:
+        f.writelines(f"{stamp} - {metric}\\n" for metric in metrics)
+
+
+if __name__ == "__main__":
+    main()
 """
         
         try:
-            with open("performance-monitor.sh", "w") as f:
+            with open("performance-monitor.py", "w") as f:
                 f.write(monitor_script)
             
-            os.chmod("performance-monitor.sh", 0o755)
+            os.chmod("performance-monitor.py", 0o755)
             
-            print("✓ Performance monitoring script created")
-            print("Add to crontab: */5 * * * * /path/to/performance-monitor.sh")
+            _print("✓ Performance monitoring script created")
+            _print("Add to crontab: */5 * * * * /path/to/performance-monitor.py")
             
         except Exception as e:
-            print(f"✗ Performance monitoring setup failed: {e}")
+            _print(f"✗ Performance monitoring setup failed: {e}")
             return False
         
         return True
@@ -326,53 +468,53 @@ log_metric "LOG_SIZE: ${LOG_SIZE}"
         with open("production-checklist.md", "w") as f:
             f.write(checklist)
         
-        print("✓ Production checklist created: production-checklist.md")
+        _print("✓ Production checklist created: production-checklist.md")
     
     def run_security_audit(self):
         """Run basic security audit."""
-        print("Running security audit...")
+        _print("Running security audit...")
         
         issues = []
         
         # Check file permissions
         sensitive_files = [".env.production", "config.py"]
         for file_path in sensitive_files:
-            if os.path.exists(file_path):
-                stat_info = os.stat(file_path)
-                if stat_info.st_mode & 0o077:  # Check if group/other have any permissions
+            try:
+                if os.stat(file_path).st_mode & 0o077:  # Check if group/other have any permissions
                     issues.append(f"File {file_path} has overly permissive permissions")
+            except FileNotFoundError:
+                pass
         
         # Check for default passwords/keys
         env_file = ".env.production"
-        if os.path.exists(env_file):
-            with open(env_file, "r") as f:
-                content = f.read()
-                if "your_" in content.lower() or "change_me" in content.lower():
+        try:
+            with open(env_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                if _DEFAULT_VALUE_PATTERN.search(content):
                     issues.append("Default values found in .env.production")
+        except (FileNotFoundError, ValueError):
+            pass  # Missing, or empty (mmap refuses zero-length files)
         
         # Check service user
         try:
-            result = subprocess.run(["id", "farmer-budget"], capture_output=True, text=True)
-            if result.returncode != 0:
+            if not self._user_exists_cached():
                 issues.append("Dedicated service user not configured")
         except:
             issues.append("Cannot verify service user configuration")
         
         # Check firewall
         try:
-            result = subprocess.run(["sudo", "ufw", "status"], capture_output=True, text=True)
-            if "Status: inactive" in result.stdout:
+            if "Status: inactive" in self._ufw_status_cached():
                 issues.append("Firewall is not enabled")
         except:
             issues.append("Cannot verify firewall status")
         
         if issues:
-            print("⚠ Security issues found:")
+            _print("⚠ Security issues found:")
             for issue in issues:
-                print(f"  - {issue}")
+                _print(f"  - {issue}")
             return False
         else:
-            print("✓ Basic security audit passed")
+            _print("✓ Basic security audit passed")
             return True
 
 def main():
@@ -385,13 +527,15 @@ def main():
     parser.add_argument("--user", action="store_true", help="Set up system user")
     parser.add_argument("--monitoring", action="store_true", help="Set up monitoring")
     parser.add_argument("--security-audit", action="store_true", help="Run security audit")
+    parser.add_argument("--aws-method", choices=["cli", "env", "test", "skip"],
+                        help="Configure AWS credentials non-interactively with this method")
     parser.add_argument("--all", action="store_true", help="Run all setup tasks")
     
     args = parser.parse_args()
     
     setup = ProductionSetup()
     
-    if args.all or not any([args.ssl, args.firewall, args.user, args.monitoring, args.security_audit]):
+    if args.all or not any([args.ssl, args.firewall, args.user, args.monitoring, args.security_audit, args.aws_method]):
         print("Running full production setup...")
         
         # Generate secrets
@@ -400,13 +544,33 @@ def main():
         for key, value in secrets.items():
             print(f"  {key}={value}")
         
-        # Run all setup tasks
-        setup.setup_system_user()
-        setup.setup_firewall()
-        setup.setup_database_security()
-        setup.setup_log_monitoring()
-        setup.setup_performance_monitoring()
-        setup.create_production_checklist()
+        if args.aws_method:
+            setup.setup_aws_credentials(args.aws_method)
+        
+        # Run all setup tasks; independent ones run concurrently and
+        # database security waits for the system user it chowns to
+        def user_then_database_security():
+            setup.setup_system_user()
+            setup.setup_database_security()
+        
+        tasks = [
+            user_then_database_security,
+            setup.setup_firewall,
+            setup.setup_log_monitoring,
+            setup.setup_performance_monitoring,
+            setup.create_production_checklist,
+        ]
+        
+        # Concurrent sudo calls would race for the password prompt, so only
+        # run in parallel once sudo is known not to prompt
+        if _sudo_ready():
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                for future in [executor.submit(task) for task in tasks]:
+                    future.result()
+        else:
+            print("sudo credentials unavailable; running setup tasks sequentially")
+            for task in tasks:
+                task()
         
         if args.domain and args.email:
             setup.setup_ssl_certificates(args.domain, args.email)
@@ -430,6 +594,9 @@ def main():
             setup.setup_log_monitoring()
             setup.setup_performance_monitoring()
         
+        if args.aws_method:
+            setup.setup_aws_credentials(args.aws_method)
+        
         if args.security_audit:
             setup.run_security_audit()
 
@@ -4,20 +4,45 @@ Test script to verify the JSON file storage system works correctly.
 Tests MarketDataCache and SessionStorage functionality.
 """
 
+import json
 import os
 import tempfile
 import shutil
 from datetime import datetime, timezone
 from pathlib import Path
 
-from app.storage import MarketDataCache, SessionStorage, StorageError
+from app.storage import MarketDataCache, SessionStorage, StorageError, _RecordLog, _COMPACT_MIN_LINES
+from app.sqlite_storage import SQLiteMarketDataCache, SQLiteSessionStorage, import_json_storage
 from app.models import (
     AnalyzeResponse, ProductAnalysisResult, PriceAnalysis, 
     EffectiveCost, SupplierRecommendation, OptimizationRecommendation,
     OptimizationType, IndividualBudget, DataAvailability,
-    OverallBudget, DataQualityReport
+    OverallBudget, DataQualityReport, PriceAlert, FarmLocation
 )
 
+def _sample_price_alerts(count: int = 3):
+    """Price alerts alert-0..alert-<count-1>, created on consecutive days"""
+    farm_location = FarmLocation(
+        street_address="123 Farm Road",
+        city="Ames",
+        state="IA",
+        county="Story",
+        zip_code="50010",
+        country="USA"
+    )
+    return [
+        PriceAlert(
+            alert_id=f"alert-{i}",
+            product_name="Corn Seeds",
+            target_price=120.0,
+            farm_location=farm_location,
+            contact_email="farmer@example.com",
+            alert_type="price_drop",
+            created_at=datetime(2024, 1, i + 1, tzinfo=timezone.utc)
+        )
+        for i in range(count)
+    ]
+
 def test_market_data_cache():
     """Test MarketDataCache functionality"""
     print("Testing MarketDataCache...")
@@ -86,6 +111,15 @@ def test_market_data_cache():
         assert cached_data["forecast_data"]["trend"] == "declining"
         assert cached_data["sentiment_data"]["supply_risk_score"] == 0.6
         
+        # Mutating a returned entry must not leak into later reads, from this
+        # or any other instance
+        cached_data["price_quotes"].clear()
+        cached_data["forecast_data"]["trend"] = "increasing"
+        for reader in (cache, MarketDataCache(cache_dir=temp_dir)):
+            refetched = reader.get_cached_market_data(product_name, location)
+            assert len(refetched["price_quotes"]) == 2
+            assert refetched["forecast_data"]["trend"] == "declining"
+        
         print("✅ Market data caching and retrieval passed")
         
         # Test cache expiration
@@ -99,137 +133,318 @@ def test_market_data_cache():
         assert removed_count >= 1
         print("✅ Expired data cleanup passed")
 
+def _sample_analysis_response() -> AnalyzeResponse:
+    """A one-product analysis response for the session storage tests"""
+    effective_cost = EffectiveCost(
+        p10=120.0,
+        p25=125.0,
+        p35=130.0,
+        p50=135.0,
+        p90=150.0
+    )
+    
+    supplier = SupplierRecommendation(
+        name="Best Seeds Inc",
+        price=128.00,
+        delivery_terms="Free shipping over $1000"
+    )
+    
+    recommendation = OptimizationRecommendation(
+        type=OptimizationType.TIMING,
+        description="Wait until March for 5% lower prices",
+        potential_savings=320.0,
+        action_required="Delay purchase by 2 months"
+    )
+    
+    analysis = PriceAnalysis(
+        product_id="corn-seeds-001",
+        product_name="Corn Seeds",
+        effective_delivered_cost=effective_cost,
+        target_price=128.00,
+        confidence_score=0.82,
+        suppliers=[supplier],
+        recommendations=[recommendation],
+        data_limitations=["Limited supplier data in region"]
+    )
+    
+    individual_budget = IndividualBudget(
+        low=6000.0,
+        target=6400.0,
+        high=7500.0,
+        total_cost=6400.0
+    )
+    
+    data_availability = DataAvailability(
+        price_data_found=True,
+        supplier_data_found=True,
+        forecast_data_available=True,
+        sentiment_data_available=False,
+        missing_data_sections=["sentiment analysis"]
+    )
+    
+    product_result = ProductAnalysisResult(
+        product_id="corn-seeds-001",
+        product_name="Corn Seeds",
+        analysis=analysis,
+        individual_budget=individual_budget,
+        data_availability=data_availability
+    )
+    
+    overall_budget = OverallBudget(
+        low=6000.0,
+        target=6400.0,
+        high=7500.0,
+        total_cost=6400.0
+    )
+    
+    data_quality_report = DataQualityReport(
+        overall_data_coverage=0.85,
+        reliable_products=["Corn Seeds"],
+        limited_data_products=[],
+        no_data_products=[]
+    )
+    
+    return AnalyzeResponse(
+        product_analyses=[product_result],
+        overall_budget=overall_budget,
+        data_quality_report=data_quality_report,
+        generated_at=datetime.now(timezone.utc)
+    )
+
+def _check_session_storage(storage) -> None:
+    """Session CRUD, listing and cleanup checks shared by both backends"""
+    analyze_response = _sample_analysis_response()
+    
+    # Test session creation and storage
+    session_id = storage.generate_session_id()
+    assert len(session_id) > 0
+    print(f"✅ Generated session ID: {session_id}")
+    
+    # Save analysis session
+    storage.save_analysis_session(session_id, analyze_response)
+    print("✅ Analysis session saved")
+    
+    # Retrieve analysis session
+    retrieved_session = storage.get_analysis_session(session_id)
+    assert retrieved_session is not None
+    assert retrieved_session["session_id"] == session_id
+    assert len(retrieved_session["analysis_response"]["product_analyses"]) == 1
+    raw_response = storage.get_analysis_session_json(session_id)
+    assert AnalyzeResponse.model_validate_json(raw_response) == analyze_response
+    print("✅ Analysis session retrieved")
+    
+    # Test session listing
+    sessions = storage.list_sessions()
+    assert len(sessions) >= 1
+    assert any(s["session_id"] == session_id for s in sessions)
+    print("✅ Session listing passed")
+    
+    # Test session deletion
+    deleted = storage.delete_session(session_id)
+    assert deleted is True
+    
+    # Verify deletion
+    retrieved_after_delete = storage.get_analysis_session(session_id)
+    assert retrieved_after_delete is None
+    print("✅ Session deletion passed")
+    
+    # Test cleanup of old sessions
+    # Create a test session and then clean it up
+    test_session_id = storage.generate_session_id()
+    storage.save_analysis_session(test_session_id, analyze_response)
+    
+    # Wait a moment and then cleanup with 0 max age
+    import time
+    time.sleep(0.1)
+    removed_count = storage.cleanup_old_sessions(max_age_days=0)
+    
+    # Check that the session was removed
+    remaining_sessions = storage.list_sessions()
+    session_exists = any(s["session_id"] == test_session_id for s in remaining_sessions)
+    assert not session_exists, "Session should have been cleaned up"
+    print("✅ Old session cleanup passed")
+    
 def test_session_storage():
     """Test SessionStorage functionality"""
     print("\nTesting SessionStorage...")
     
     # Create temporary directory for testing
     with tempfile.TemporaryDirectory() as temp_dir:
-        storage = SessionStorage(cache_dir=temp_dir)
-        
-        # Create test analysis response
-        effective_cost = EffectiveCost(
-            p10=120.0,
-            p25=125.0,
-            p35=130.0,
-            p50=135.0,
-            p90=150.0
-        )
-        
-        supplier = SupplierRecommendation(
-            name="Best Seeds Inc",
-            price=128.00,
-            delivery_terms="Free shipping over $1000"
-        )
-        
-        recommendation = OptimizationRecommendation(
-            type=OptimizationType.TIMING,
-            description="Wait until March for 5% lower prices",
-            potential_savings=320.0,
-            action_required="Delay purchase by 2 months"
-        )
-        
-        analysis = PriceAnalysis(
-            product_id="corn-seeds-001",
-            product_name="Corn Seeds",
-            effective_delivered_cost=effective_cost,
-            target_price=128.00,
-            confidence_score=0.82,
-            suppliers=[supplier],
-            recommendations=[recommendation],
-            data_limitations=["Limited supplier data in region"]
-        )
+        _check_session_storage(SessionStorage(cache_dir=temp_dir))
+
+def test_sqlite_session_storage():
+    """Test SQLiteSessionStorage against the same session flows"""
+    print("\nTesting SQLiteSessionStorage...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _check_session_storage(SQLiteSessionStorage(cache_dir=temp_dir))
         
-        individual_budget = IndividualBudget(
-            low=6000.0,
-            target=6400.0,
-            high=7500.0,
-            total_cost=6400.0
-        )
+        storage = SQLiteSessionStorage(cache_dir=temp_dir)
+        analyze_response = _sample_analysis_response()
+        for _ in range(3):
+            storage.save_analysis_session(storage.generate_session_id(), analyze_response)
+        assert storage.count_sessions() == 3
+        assert storage.get_recent_budget_targets(2) == [6400.0, 6400.0]
+        print("✅ SQLite session counts and budget targets passed")
+
+def test_import_json_storage():
+    """Test copying the JSON backend's data into SQLite"""
+    print("\nTesting JSON to SQLite import...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = MarketDataCache(cache_dir=temp_dir)
+        cache.cache_market_data("Corn Seeds", "Iowa, USA", [{"supplier": "Test", "price": 100}])
+        cache.save_price_alerts(_sample_price_alerts())
+        cache.cancel_price_alert("alert-1")
+        sessions = SessionStorage(cache_dir=temp_dir)
+        analyze_response = _sample_analysis_response()
+        session_id = sessions.generate_session_id()
+        sessions.save_analysis_session(session_id, analyze_response)
         
-        data_availability = DataAvailability(
-            price_data_found=True,
-            supplier_data_found=True,
-            forecast_data_available=True,
-            sentiment_data_available=False,
-            missing_data_sections=["sentiment analysis"]
-        )
+        counts = import_json_storage(temp_dir)
+        assert counts == {"market_data": 1, "price_alerts": 3, "purchase_records": 0, "sessions": 1}
         
-        product_result = ProductAnalysisResult(
-            product_id="corn-seeds-001",
-            product_name="Corn Seeds",
-            analysis=analysis,
-            individual_budget=individual_budget,
-            data_availability=data_availability
-        )
+        sqlite_cache = SQLiteMarketDataCache(cache_dir=temp_dir)
+        assert sqlite_cache.get_cached_market_data("Corn Seeds", "Iowa, USA")["price_quotes"][0]["price"] == 100
+        assert sqlite_cache.list_price_alerts() == cache.list_price_alerts()
+        sqlite_sessions = SQLiteSessionStorage(cache_dir=temp_dir)
+        assert sqlite_sessions.list_sessions()[0]["session_id"] == session_id
+        raw_response = sqlite_sessions.get_analysis_session_json(session_id)
+        assert AnalyzeResponse.model_validate_json(raw_response) == analyze_response
         
-        overall_budget = OverallBudget(
-            low=6000.0,
-            target=6400.0,
-            high=7500.0,
-            total_cost=6400.0
-        )
+        # Re-running replaces rather than duplicates
+        assert import_json_storage(temp_dir) == counts
+        assert sqlite_sessions.count_sessions() == 1
+        print("✅ JSON to SQLite import passed")
+
+def test_record_log_replay():
+    """Test that alert logs replay to the latest state when reopened"""
+    print("\nTesting record log replay...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = MarketDataCache(cache_dir=temp_dir)
+        alerts = _sample_price_alerts()
+        cache.save_price_alert(alerts[0])
+        cache.save_price_alerts(alerts[1:])
+        assert cache.cancel_price_alert("alert-1") is True
+        assert cache.cancel_price_alert("missing") is False
         
-        data_quality_report = DataQualityReport(
-            overall_data_coverage=0.85,
-            reliable_products=["Corn Seeds"],
-            limited_data_products=[],
-            no_data_products=[]
-        )
+        # Another instance over the same directory sees the same alerts
+        reopened = MarketDataCache(cache_dir=temp_dir)
+        alerts = reopened.list_price_alerts()
+        assert len(alerts) == 3
+        cancelled = reopened.list_price_alerts(status="cancelled")
+        assert [a["alert_id"] for a in cancelled] == ["alert-1"]
+        assert [a["alert_id"] for a in reopened.iter_price_alerts()] == [a["alert_id"] for a in alerts]
         
-        analyze_response = AnalyzeResponse(
-            product_analyses=[product_result],
-            overall_budget=overall_budget,
-            data_quality_report=data_quality_report,
-            generated_at=datetime.now(timezone.utc)
-        )
+        # Writes through one instance are visible to the other
+        cache.cancel_price_alert("alert-2")
+        assert len(reopened.list_price_alerts(status="cancelled")) == 2
+        print("✅ Record log replay passed")
+
+def test_legacy_json_migration():
+    """Test that whole-file JSON alerts and purchases are migrated into logs"""
+    print("\nTesting legacy JSON migration...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        legacy_alerts = {
+            alert.alert_id: alert.model_dump(mode="json") for alert in _sample_price_alerts()
+        }
+        # Older files hold str(datetime), with a space instead of the T
+        legacy_alerts["alert-old"] = {
+            **legacy_alerts["alert-0"], "alert_id": "alert-old", "created_at": "2024-01-02 10:00:00"
+        }
+        legacy_purchase = {
+            "purchase_id": "purchase-1",
+            "product_name": "Corn Seeds",
+            "supplier": "AgriSupply Co",
+            "actual_price": 140.0,
+            "target_price": 145.0,
+            "quantity": 10,
+            "total_cost": 1400.0,
+            "purchase_date": "2024-02-01",
+            "price_variance": -5.0,
+            "price_variance_percentage": -3.4,
+            "performance_rating": "excellent",
+            "recorded_at": "2024-02-01T12:00:00+00:00"
+        }
+        data_dir = Path(temp_dir)
+        (data_dir / "price_alerts.json").write_text(json.dumps(legacy_alerts))
+        (data_dir / "purchase_records.json").write_text(json.dumps({"purchase-1": legacy_purchase}))
         
-        # Test session creation and storage
-        session_id = storage.generate_session_id()
-        assert len(session_id) > 0
-        print(f"✅ Generated session ID: {session_id}")
+        cache = MarketDataCache(cache_dir=temp_dir)
+        alerts = cache.list_price_alerts()
+        assert [a["alert_id"] for a in alerts] == ["alert-2", "alert-old", "alert-1", "alert-0"]
+        assert alerts[1]["created_at"] == "2024-01-02T10:00:00"
+        assert cache.get_purchase_history("Corn Seeds") == [legacy_purchase]
         
-        # Save analysis session
-        storage.save_analysis_session(session_id, analyze_response)
-        print("✅ Analysis session saved")
+        # The legacy files are kept aside and the logs hold the records
+        assert not (data_dir / "price_alerts.json").exists()
+        assert (data_dir / "price_alerts.json.migrated").exists()
+        assert (data_dir / "purchase_records.json.migrated").exists()
+        assert len((data_dir / "price_alerts.jsonl").read_text().splitlines()) == 4
+        print("✅ Legacy JSON migration passed")
+
+def test_record_log_compaction():
+    """Test that patches, deletes and compaction replay to the same state on reopen"""
+    print("\nTesting record log compaction...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "records.jsonl"
+        log = _RecordLog(path, "id", order_field="created_at")
+        for i in range(10):
+            log.put({"id": f"r{i}", "created_at": f"2024-01-{i + 1:02d}", "count": 0})
+        for _ in range(_COMPACT_MIN_LINES):
+            assert log.update("r3", {"count": log.get("r3")["count"] + 1})
+        assert log.delete("r5")
+        assert not log.update("r5", {"count": 1})
         
-        # Retrieve analysis session
-        retrieved_session = storage.get_analysis_session(session_id)
-        assert retrieved_session is not None
-        assert retrieved_session["session_id"] == session_id
-        assert len(retrieved_session["analysis_response"]["product_analyses"]) == 1
-        print("✅ Analysis session retrieved")
+        # Enough patches pile up to trigger compaction, which drops them
+        line_count = len(path.read_bytes().splitlines())
+        assert line_count < _COMPACT_MIN_LINES
         
-        # Test session listing
-        sessions = storage.list_sessions()
-        assert len(sessions) >= 1
-        assert any(s["session_id"] == session_id for s in sessions)
-        print("✅ Session listing passed")
+        def state(record_log):
+            return [(r["id"], r["count"]) for r in record_log.newest(20)]
         
-        # Test session deletion
-        deleted = storage.delete_session(session_id)
-        assert deleted is True
+        expected = state(log)
+        assert [record_id for record_id, _ in expected] == [f"r{i}" for i in (9, 8, 7, 6, 4, 3, 2, 1, 0)]
+        assert dict(expected)["r3"] == _COMPACT_MIN_LINES
+        assert state(_RecordLog(path, "id", order_field="created_at")) == expected
         
-        # Verify deletion
-        retrieved_after_delete = storage.get_analysis_session(session_id)
-        assert retrieved_after_delete is None
-        print("✅ Session deletion passed")
+        # Patches appended after a compaction replay on top of the rewrite
+        log.update("r0", {"count": 7})
+        log.compact()
+        log.update("r1", {"count": 9})
+        reopened = _RecordLog(path, "id", order_field="created_at")
+        assert state(reopened) == state(log)
+        assert reopened.get("r0")["count"] == 7 and reopened.get("r1")["count"] == 9
+        assert len(reopened) == 9
+        print("✅ Record log compaction passed")
+
+def test_sqlite_backend():
+    """Test the SQLite backend against the same market data and alert flows"""
+    print("\nTesting SQLite backend...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = SQLiteMarketDataCache(cache_dir=temp_dir)
         
-        # Test cleanup of old sessions
-        # Create a test session and then clean it up
-        test_session_id = storage.generate_session_id()
-        storage.save_analysis_session(test_session_id, analyze_response)
+        cache.cache_market_data("Corn Seeds", "Iowa, USA", [{"supplier": "Test", "price": 100}])
+        cached_data = cache.get_cached_market_data("corn seeds ", "Iowa, USA")
+        assert cached_data is not None
+        assert cached_data["price_quotes"][0]["price"] == 100
+        assert cache.get_cached_market_data("Corn Seeds", "Iowa, USA", max_age_hours=0) is None
+        assert cache.clear_expired_market_data(max_age_hours=0) == 1
         
-        # Wait a moment and then cleanup with 0 max age
-        import time
-        time.sleep(0.1)
-        removed_count = storage.cleanup_old_sessions(max_age_days=0)
+        alerts = _sample_price_alerts()
+        cache.save_price_alert(alerts[0])
+        cache.save_price_alerts(alerts[1:])
+        assert cache.cancel_price_alert("alert-1") is True
+        assert cache.cancel_price_alert("missing") is False
         
-        # Check that the session was removed
-        remaining_sessions = storage.list_sessions()
-        session_exists = any(s["session_id"] == test_session_id for s in remaining_sessions)
-        assert not session_exists, "Session should have been cleaned up"
-        print("✅ Old session cleanup passed")
+        alerts = SQLiteMarketDataCache(cache_dir=temp_dir).list_price_alerts()
+        assert [a["alert_id"] for a in alerts] == ["alert-2", "alert-1", "alert-0"]
+        assert alerts[1]["status"] == "cancelled"
+        print("✅ SQLite backend passed")
 
 def test_error_handling():
     """Test error handling in storage operations"""
@@ -264,6 +479,12 @@ def main():
     try:
         test_market_data_cache()
         test_session_storage()
+        test_sqlite_session_storage()
+        test_import_json_storage()
+        test_record_log_replay()
+        test_legacy_json_migration()
+        test_record_log_compaction()
+        test_sqlite_backend()
         test_error_handling()
         
         print("\n" + "=" * 50)